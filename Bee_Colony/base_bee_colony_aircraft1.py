@@ -24,13 +24,15 @@ T_START = 0.0 #starting time of the aircraft. will be variable in the bee colony
 from Bee_Colony.random_or_mutate_trajectory_and_roulette_wheel import RandomTrajectory
 from Bee_Colony.random_or_mutate_trajectory_and_roulette_wheel import MutateSolution
 from graph_build_for_bee.build_graph_function import build_graph
-from Trajectory.trajectory_cost_ac1 import get_trajectory_cost
+from src.edge_geometry import EdgeGeometryTable
+from Trajectory.trajectory_cost_ac1 import get_trajectory_cost, evaluate_trajectory
 from Bee_Colony.random_or_mutate_trajectory_and_roulette_wheel import select_index_by_probability
 import numpy as np
 
 
 
-nodes, node_coords, graph, N_RINGS, N_ANGLES = build_graph()
+edge_geometry = EdgeGeometryTable() #static distance, heading and ANSP costs of every edge, filled once by build_graph
+nodes, node_coords, graph, N_RINGS, N_ANGLES = build_graph(edge_geometry=edge_geometry)
 Node_coordinates = node_coords #as usual build our graph. by accident, in calling the functions, I typed Node_coordinates instead of node_coords. to fix it in one line, i put this statement
 
 """
@@ -52,10 +54,12 @@ Solutions = [None] * NP #make a list with the length of NP. All the solutions wi
 Costs = [None] * NP #make a list with the length of NP. All the values of Costs will come into this list
 Trials = [0] * NP #make a list with the length of NP. All the values of Trials will come into this list
 Prob = [0.0] * NP #make a list with the length of NP. All the Prob of solutions will come into this list
+Evaluations = [None] * NP #the running totals (weight, time, fuel, costs) at every node of every solution. a mutation keeps the start of the route, so it continues from these
 
 for i in range(NP):
     Solutions[i] = RandomTrajectory(start_node, goal_node, graph, n_rings=N_RINGS, rng=rng) #generate random trajectories
-    cost_euro, fuel_burn, time_s, weight = get_trajectory_cost(Solutions[i], Node_coordinates, t_start=T_START) #get the trajectory costs for each solution
+    Evaluations[i] = evaluate_trajectory(Solutions[i], Node_coordinates, t_start=T_START, edge_geometry=edge_geometry) #get the trajectory costs for each solution
+    cost_euro, fuel_burn, time_s, weight = Evaluations[i].result
     Costs[i] = cost_euro #store the costs in the list
 
 min_cost = min(Costs) #finds the minimum value of all costs
@@ -81,11 +85,13 @@ while iteration < NumIter: #start of the headloop
         current_costs = Costs[i] #corresponding costs
 
         candidate_solution = MutateSolution(current_solution, graph, n_rings=N_RINGS, rng=rng) #mutate the trajectory using the function
-        candidate_costs, _, _, _ = get_trajectory_cost(candidate_solution, Node_coordinates, t_start=T_START) #get the trajectory costs of the mutated trajectory
+        candidate = evaluate_trajectory(candidate_solution, Node_coordinates, t_start=T_START, edge_geometry=edge_geometry, parent=Evaluations[i]) #get the trajectory costs of the mutated trajectory. only the part after the mutation is calculated
+        candidate_costs = candidate.result[0]
 
         if candidate_costs < current_costs:
             Solutions[i] = candidate_solution
             Costs[i] = candidate_costs #accept the mutation if it decreases costs
+            Evaluations[i] = candidate
             Trials[i] = 0 #if accepted, no trials will be added
 
         else:
@@ -120,11 +126,13 @@ while iteration < NumIter: #start of the headloop
         base_cost = Costs[k] #associated costs
 
         candidate_solution = MutateSolution(base_solution, graph, n_rings=N_RINGS, rng=rng) #make a mutation
-        candidate_cost, _, _, _ = get_trajectory_cost(candidate_solution, Node_coordinates, t_start=T_START) #calculate the costs of this mutation
+        candidate = evaluate_trajectory(candidate_solution, Node_coordinates, t_start=T_START, edge_geometry=edge_geometry, parent=Evaluations[k]) #calculate the costs of this mutation
+        candidate_cost = candidate.result[0]
 
         if candidate_cost < base_cost:
             Solutions[k] = candidate_solution
             Costs[k] = candidate_cost #same as for employed. if the mutation is a success, replace the new trajectory with the old
+            Evaluations[k] = candidate
             Trials[k] = 0 #if the mutation is a success, do not add a trial, else, add a trial.
         else:
             Trials[k] += 1
@@ -148,7 +156,8 @@ while iteration < NumIter: #start of the headloop
 
         if Trials[i] > LIMIT:
             Solutions[i] = RandomTrajectory(start_node, goal_node, graph, n_rings=N_RINGS, rng=rng) #make a new random trajectory
-            new_costs, _, _, _ = get_trajectory_cost(Solutions[i], Node_coordinates, t_start=T_START) #get the costs
+            Evaluations[i] = evaluate_trajectory(Solutions[i], Node_coordinates, t_start=T_START, edge_geometry=edge_geometry) #get the costs
+            new_costs = Evaluations[i].result[0]
             Costs[i] = new_costs #replace the costs
             Trials[i] = 0 #reset the trials
 
@@ -167,7 +176,7 @@ while iteration < NumIter: #start of the headloop
 print(f'The best trajectory are the following waypoint: {BestSolution}')
 
 
-_, total_fuel, total_time, _ = get_trajectory_cost(BestSolution, Node_coordinates, t_start=T_START) #get the fuel burn and flight time of the best solution
+_, total_fuel, total_time, _ = get_trajectory_cost(BestSolution, Node_coordinates, t_start=T_START, edge_geometry=edge_geometry) #get the fuel burn and flight time of the best solution
 
 
 
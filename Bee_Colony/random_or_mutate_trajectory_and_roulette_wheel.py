@@ -21,6 +21,12 @@ goal_node = 610 #JFK
 
 
 
+def get_neighbors(graph, node): #the neighbor IDs of a node, without the dummy costs
+    if hasattr(graph, 'successors'):
+        return graph.successors(node) #array backed graph (src/grid_graph.py): a view on its neighbor array, nothing to strip
+    return [neighbor_id for (neighbor_id, _) in graph.get(node, [])] #our adjecency lists still has costs. i put a dummy in it that all edge costs are 0 because we don't work with edge costs, only trajectory costs. the _ throws away the costs in this line
+
+
 def RandomTrajectory(start_node, goal_node, graph, n_rings=29, rng=None): #define the function to create a trajectory
 
     if rng is None:
@@ -35,15 +41,13 @@ def RandomTrajectory(start_node, goal_node, graph, n_rings=29, rng=None): #defin
 
     while current != goal_node: #continue until goal node is reached
 
-        edges = graph.get(current, []) #get the outgoing edges by calling the adjacency list(graph)
+        neighbors = get_neighbors(graph, current) #get the neighbors by calling the adjacency list(graph)
 
-        if not edges: #if edges is an empty list
+        if len(neighbors) == 0: #if there are no neighbors
             raise ValueError(
                 f"Node {current} does not have outgoing edges, cannot reach {goal_node}."
             ) #safety check. Raises a value error if the node doesn't have outgoing edges
 
-        neighbors = [neighbor_id for (neighbor_id, _) in edges] #our adjecency lists still has costs. i put a dummy in it that all edge costs are 0 because we don't work with edge costs, only trajectory costs. the _ throws away the costs in this line
-
         next = int(rng.choice(neighbors)) #choose a random neighbor. the int() is for later, otherwise the nodes come out as this: np.int64(17)
 
         trajectory.append(next) #add it to the list of nodes
@@ -77,11 +81,11 @@ def MutateSolution(solution, graph, n_rings=29, rng=None, max_tries=200): #defin
     prev_node = solution[position - 1] #the node in the previous ring
     old_node  = solution[position] #the node that is selected
 
-    prev_edges = graph.get(prev_node, []) #get the outgoing edges out of the previous node
-    if not prev_edges:
+    prev_neighbors = get_neighbors(graph, prev_node) #get the neighbors of the previous node
+    if len(prev_neighbors) == 0:
         return None #if there are not any outgoing edges, return None. for testing this function
 
-    feasible_options = [nid for (nid, _) in prev_edges if nid != old_node] #make a list of feasible alternatives from previous node and filter the old node
+    feasible_options = [nid for nid in prev_neighbors if nid != old_node] #make a list of feasible alternatives from previous node and filter the old node
     if not feasible_options:
         return None #if it gives an [], the old node was the only option from the previous node
 
@@ -94,11 +98,10 @@ def MutateSolution(solution, graph, n_rings=29, rng=None, max_tries=200): #defin
     steps = 0 #for the safety check later. Checks if it gives a feasible route. every next edge is a step
 
     while current != goal_node:
-        edges = graph.get(current, []) #get the outgoing edges for the current node
-        if not edges:
+        neighbors = get_neighbors(graph, current) #get the neighbors of the current node
+        if len(neighbors) == 0:
             break #stops the loop if there are not any outgoing edges anymore
 
-        neighbors = [nid for (nid, _) in edges] #again, list the neighbors and remove the dummy costs
         next = int(rng.choice(neighbors)) #choose a neighbor
 
         new_solution.append(next) #add the node to the solution
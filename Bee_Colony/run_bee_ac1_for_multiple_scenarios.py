@@ -20,12 +20,24 @@ T_MAX = 7.5
 T_MIN = 7.0
 t_max = 39.0 #this is for interpolation of weather
 T_START = 0.0
+EARLY_ABORT = False #if True, a mutation stops being evaluated as soon as it can't be cheaper than the solution it came from. same results, less edges
+BATCH_EVALUATION = False #if True, the employed and onlooker phases evaluate all their candidates in one vectorized sweep
+CACHE_TRAJECTORIES = False #if True, trajectory results are cached in memory and in an sqlite file, shared by all runs and later sweeps
+MEMO_EDGE_COSTS = False #if True, edge costs are memoized with the time and weight rounded to the quanta below
+MEMO_SIZE = 500_000
+MEMO_TIME_QUANTUM_H = 1.0 / 60.0
+MEMO_WEIGHT_QUANTUM_KG = 50.0
+MEMO_CHECK_ERROR = False #if True, every memo hit is also calculated exactly and the worst error is reported. slow, only to choose the quanta
 
 
 from Bee_Colony.random_or_mutate_trajectory_and_roulette_wheel import RandomTrajectory
 from Bee_Colony.random_or_mutate_trajectory_and_roulette_wheel import MutateSolution
 from graph_build_for_bee.build_graph_function import build_graph
-from Trajectory.trajectory_cost_ac1 import get_trajectory_cost
+from src.edge_geometry import EdgeGeometryTable
+from Trajectory.trajectory_cost_ac1 import get_trajectory_cost, evaluate_trajectory, get_trajectory_cost_batch
+from Trajectory.edge_cost_aircraft1 import get_edge_cost
+from Trajectory.edge_cost_memo import EdgeCostMemo
+from Trajectory.trajectory_cache import TrajectoryCache, CACHE_PATH
 from Bee_Colony.random_or_mutate_trajectory_and_roulette_wheel import select_index_by_probability
 import pandas as pd
 from pathlib import Path
@@ -44,22 +56,41 @@ def run_abc_once(
     NP=POPULATION_SIZE,
     NumIter=MAX_ITERATIONS,
     Limit=LIMIT,
-    seed=None
+    seed=None,
+    edge_geometry=None,
+    edge_cost_fn=get_edge_cost,
+    batch_evaluation=False,
+    early_abort=False,
+    trajectory_cache=None
 ): #define a function which will run the bee algorithm once. Be aware, in the base_bee_colony_aircraft 1
     #I already commented how the bee algorithm itself works, so im not going to comment the algorithm itself again
+    #batch_evaluation: all candidates of the employed phase and of the onlooker phase are evaluated together with
+    #get_trajectory_cost_batch (needs edge_geometry). the onlookers then all mutate the solutions as they were at the
+    #start of their phase, instead of a solution that another onlooker may have just improved
+    #early_abort: the cost of the solution that is mutated is the cutoff of evaluate_trajectory. a mutation that can't beat it
+    #is stopped early. it would be rejected anyway, so the bees make exactly the same choices
+    #trajectory_cache: a TrajectoryCache. trajectories that were evaluated before (in this run, another run or on disk) are looked up
+
+    if batch_evaluation and edge_geometry is None:
+        raise ValueError("batch_evaluation needs the edge_geometry of the graph")
+    if batch_evaluation and (edge_cost_fn is not get_edge_cost or trajectory_cache is not None):
+        raise ValueError("batch_evaluation always uses the exact vectorized costs, it can't be combined with another edge_cost_fn or a trajectory_cache")
 
     rng = np.random.default_rng(seed)
+    evaluate = evaluate_trajectory if trajectory_cache is None else trajectory_cache.evaluate
+    trajectory_cost = get_trajectory_cost if trajectory_cache is None else trajectory_cache
 
     Solutions = [None] * NP
     Costs = [None] * NP
+    Evaluations = [None] * NP #running totals per node of every solution, so a mutation only recalculates its new tail
     Trials = [0] * NP
     Prob = [0.0] * NP
 
 
     for i in range(NP):
         Solutions[i] = RandomTrajectory(start_node, goal_node, graph, n_rings=N_RINGS, rng=rng)
-        cost_euro, fuel_burn, time_h, weight_end = get_trajectory_cost(Solutions[i], node_coords, t_start=t_start)
-        Costs[i] = cost_euro
+        Evaluations[i] = evaluate(Solutions[i], node_coords, t_start=t_start, edge_geometry=edge_geometry, edge_cost_fn=edge_cost_fn)
+        Costs[i] = Evaluations[i].result[0]
 
 
 
@@ -72,16 +103,32 @@ def run_abc_once(
     iteration = 0
     while iteration < NumIter:
 
-        for i in range(NP):
+        if batch_evaluation:
+            candidates = [MutateSolution(Solutions[i], graph, n_rings=N_RINGS, rng=rng) for i in range(NP)]
+            candidates = [c if c is not None else Solutions[i] for i, c in enumerate(candidates)] #a failed mutation is the same solution, so it counts as a trial
+            candidate_costs, _, _, _ = get_trajectory_cost_batch(candidates, t_start, edge_geometry) #one sweep for the whole population
+
+            for i in range(NP):
+                if candidate_costs[i] < Costs[i]:
+                    Solutions[i] = candidates[i]
+                    Costs[i] = float(candidate_costs[i])
+                    Evaluations[i] = None
+                    Trials[i] = 0
+                else:
+                    Trials[i] += 1
+
+        for i in range(NP if not batch_evaluation else 0):
             current_solution = Solutions[i]
             current_cost = Costs[i]
 
             candidate_solution = MutateSolution(current_solution, graph, n_rings=N_RINGS, rng=rng)
-            candidate_cost, _, _, _ = get_trajectory_cost(candidate_solution, node_coords, t_start=t_start)
+            candidate = evaluate(candidate_solution, node_coords, t_start=t_start, edge_geometry=edge_geometry, edge_cost_fn=edge_cost_fn, parent=Evaluations[i], cutoff=current_cost if early_abort else None)
+            candidate_cost = candidate.result[0]
 
             if candidate_cost < current_cost:
                 Solutions[i] = candidate_solution
                 Costs[i] = candidate_cost
+                Evaluations[i] = candidate
                 Trials[i] = 0
             else:
                 Trials[i] += 1
@@ -106,18 +153,39 @@ def run_abc_once(
         else:
             Prob = [ai / SumA for ai in a]
 
-        for _ in range(NP):
+        if batch_evaluation:
+            chosen = []
+            candidates = []
+            for _ in range(NP):
+                k = select_index_by_probability(Prob, rng=rng)
+                candidate_solution = MutateSolution(Solutions[k], graph, n_rings=N_RINGS, rng=rng)
+                chosen.append(k)
+                candidates.append(candidate_solution if candidate_solution is not None else Solutions[k])
+            candidate_costs, _, _, _ = get_trajectory_cost_batch(candidates, t_start, edge_geometry)
+
+            for k, candidate_solution, candidate_cost in zip(chosen, candidates, candidate_costs.tolist()):
+                if candidate_cost < Costs[k]: #compared with the current costs, another onlooker may have improved k already
+                    Solutions[k] = candidate_solution
+                    Costs[k] = candidate_cost
+                    Evaluations[k] = None
+                    Trials[k] = 0
+                else:
+                    Trials[k] += 1
+
+        for _ in range(NP if not batch_evaluation else 0):
             k = select_index_by_probability(Prob, rng=rng)
 
             base_solution = Solutions[k]
             base_cost = Costs[k]
 
             candidate_solution = MutateSolution(base_solution, graph, n_rings=N_RINGS, rng=rng)
-            candidate_cost, _, _, _ = get_trajectory_cost(candidate_solution, node_coords, t_start=t_start)
+            candidate = evaluate(candidate_solution, node_coords, t_start=t_start, edge_geometry=edge_geometry, edge_cost_fn=edge_cost_fn, parent=Evaluations[k], cutoff=base_cost if early_abort else None)
+            candidate_cost = candidate.result[0]
 
             if candidate_cost < base_cost:
                 Solutions[k] = candidate_solution
                 Costs[k] = candidate_cost
+                Evaluations[k] = candidate
                 Trials[k] = 0
             else:
                 Trials[k] += 1
@@ -137,8 +205,8 @@ def run_abc_once(
 
             if Trials[i] > Limit:
                 Solutions[i] = RandomTrajectory(start_node, goal_node, graph, n_rings=N_RINGS, rng=rng)
-                new_cost, _, _, _ = get_trajectory_cost(Solutions[i], node_coords, t_start=t_start)
-                Costs[i] = new_cost
+                Evaluations[i] = evaluate(Solutions[i], node_coords, t_start=t_start, edge_geometry=edge_geometry, edge_cost_fn=edge_cost_fn)
+                Costs[i] = Evaluations[i].result[0]
                 Trials[i] = 0
 
 
@@ -150,17 +218,26 @@ def run_abc_once(
 
         iteration += 1
 
-    best_cost_eur, best_fuel_kg, best_time_h, best_weight_end = get_trajectory_cost(BestSolution, node_coords, t_start=t_start)
+    best_cost_eur, best_fuel_kg, best_time_h, best_weight_end = trajectory_cost(BestSolution, node_coords, t_start=t_start, edge_geometry=edge_geometry, edge_cost_fn=get_edge_cost) #always the exact costs for the results, also when the search used the memo
 
     return BestSolution, float(best_cost_eur), float(best_fuel_kg), float(best_time_h), float(best_weight_end)
     #now, we have made our function which returns the best cost, best fuel, best time, and best weight
 
 def main(): #now we want to run the bees multiple times for multiple scenarios, so we define a new function
-    nodes, node_coords, graph, N_RINGS, N_ANGLES = build_graph() #again, build our graph
+    edge_geometry = EdgeGeometryTable() #distance, heading and ANSP costs of every edge. filled once by build_graph
+    nodes, node_coords, graph, N_RINGS, N_ANGLES = build_graph(edge_geometry=edge_geometry) #again, build our graph
 
     OUT_DIR = Path("total_costs_ac1_per_time")
     OUT_DIR.mkdir(parents=True, exist_ok=True) #this statement is later used for where the csv files will be exported to
 
+    edge_cost_fn = get_edge_cost
+    if MEMO_EDGE_COSTS:
+        edge_cost_fn = EdgeCostMemo(MEMO_SIZE, MEMO_TIME_QUANTUM_H, MEMO_WEIGHT_QUANTUM_KG, check_error=MEMO_CHECK_ERROR) #shared by all runs and scenarios
+
+    trajectory_cache = None
+    if CACHE_TRAJECTORIES:
+        trajectory_cache = TrajectoryCache(path=CACHE_PATH) #shared by all runs and scenarios, and by the next sweep through the file
+
     N_RUNS = 30 #amount of times the algorithm runs per scenario
     BASE_SEED = 10000 #seed for run 1
     t_starts = [float(i) for i in range(31)] #this is for the different scenarios. Each scenario is 1 hour later. we do this until t = 30. because we start at t = 0, these are 31 scenarios
@@ -181,7 +258,12 @@ def main(): #now we want to run the bees multiple times for multiple scenarios,
                 NP=POPULATION_SIZE,
                 NumIter=MAX_ITERATIONS,
                 Limit=LIMIT,
-                seed=seed
+                seed=seed,
+                edge_geometry=edge_geometry,
+                edge_cost_fn=edge_cost_fn,
+                batch_evaluation=BATCH_EVALUATION,
+                early_abort=EARLY_ABORT,
+                trajectory_cache=trajectory_cache
             )
             runtime_sec = time.perf_counter() - t0 # seconds to run the abc once
 
@@ -201,6 +283,14 @@ def main(): #now we want to run the bees multiple times for multiple scenarios,
         df.to_csv(out_path, index=False) #i dont need the index, i have a column with run ID
 
         print(f"Created: {csv_name}") #for me to check how far in the run we are, because it takes a while
+        if MEMO_EDGE_COSTS:
+            print(f"Edge cost memo: {edge_cost_fn.stats()}") #hit rate, and the worst errors if MEMO_CHECK_ERROR is on
+        if CACHE_TRAJECTORIES:
+            trajectory_cache.flush() #make the results of this scenario available to other processes
+            print(f"Trajectory cache hit rate: {trajectory_cache.hit_rate:.1%}")
+
+    if CACHE_TRAJECTORIES:
+        trajectory_cache.close()
 
 if __name__ == "__main__":
     main()
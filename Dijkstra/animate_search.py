@@ -14,6 +14,8 @@ import matplotlib.pyplot as plt
 import matplotlib.animation as animation
 import numpy as np
 
+from src.search_trace import read_trace
+
 # --- CONFIGURATION ---
 ANIMATION_DURATION_SEC = 5.0  # Time spent searching (Green dots)
 PAUSE_AT_END_SEC = 5.0  # Time to hold the final result (Red line)
@@ -39,14 +41,19 @@ def animate_optimization():
         print("Make sure you ran 'main_dijkstra.py' first!")
         return
 
+    # The binary trace of main_dijkstra.py (int32 node IDs), or the text file of older runs
     history = []
-    try:
-        with open("search_history.txt", "r") as f:
-            for line in f:
-                history.append(int(line.strip()))
-    except FileNotFoundError:
-        print("Error: 'search_history.txt' not found.")
-        return
+    if os.path.exists("search_history.bin"):
+        history = read_trace("search_history.bin").tolist()
+    else:
+        try:
+            with open("search_history.txt", "r") as f:
+                for line in f:
+                    history.append(int(line.strip()))
+        except FileNotFoundError:
+            print("Error: 'search_history.bin' not found.")
+            print("Make sure you ran 'main_dijkstra.py' with SEARCH_TRACE_FILE set!")
+            return
 
     final_path = []
     try:
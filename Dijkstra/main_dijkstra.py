@@ -1,6 +1,7 @@
 import sys
 import os
 import time
+from functools import partial
 
 """
 main_dijkstra.py is the main script to run the Dijkstra algorithm.
@@ -16,8 +17,14 @@ sys.path.append(parent_dir)
 
 # Import
 from src.grid import generate_grid, build_adjacency_list
-from src.solver_1 import solve_dynamic_dijkstra
+from src.edge_geometry import EdgeGeometryTable
+from src.graph_cache import cached_grid_graph
+from src.solver_1 import solve_dynamic_dijkstra, MIN_DRY_WEIGHT_KG
+from src.cost_to_go import cost_to_go
+from src.search_trace import BinaryTraceFile
 from Trajectory.edge_cost_aircraft1 import get_edge_cost
+from Trajectory.edge_cost_bound import EdgeCostBound
+from Trajectory.edge_cost_memo import EdgeCostMemo
 
 # Global variables
 
@@ -31,11 +38,24 @@ N_ANGLES = 21 # Lateral options per slice (how far left/right we can go).
 RING_SPACING_KM = 200.0 # Resolution: how often we check for a new heading.
 MAX_WIDTH_KM = 1800.0 # Limits how far the route can deviate (the 'search funnel').
 BASE_WIDTH_M = 40000.0 # Minimum width near the start/end points.
+USE_GRAPH_CACHE = True # Load grid, adjacency and edge geometry from graph_cache/ (built on the first run)
 
 # C - Dijkstra settings
 INITIAL_WEIGHT_KG = 257743.0 # Starting weight
 START_TIME_SEC = 0.0 # Reference time for weather interpolation
 TIME_BIN_SEC = 100.0 # Pareto Pruning resolution (groups similar arrival times)
+PARETO_NEIGHBOR_BINS = 0 # Also test dominance against this many time bins on both sides (fewer states, may cost optimality)
+PARETO_EPSILON_COST = 0.0 # Tolerance of the dominance test in € (0.0 is exact)
+PARETO_EPSILON_WEIGHT = 0.0 # Tolerance of the dominance test in kg (0.0 is exact)
+USE_A_STAR = True # Order the states by cost + a lower bound of the cost to JFK. Same optimum, fewer states
+SEARCH_TRACE_FILE = "search_history.bin" # Binary trace of the visited nodes for animate_search.py (None: no trace, no I/O)
+
+# Optional memoization of edge costs (time and weight are rounded to the quanta below)
+MEMO_EDGE_COSTS = False
+MEMO_SIZE = 200_000 # Maximum amount of remembered edge costs
+MEMO_TIME_QUANTUM_H = 1.0 / 60.0 # 1 minute
+MEMO_WEIGHT_QUANTUM_KG = 50.0
+MEMO_CHECK_ERROR = False # Also calculate the exact cost of every memo hit and report the worst error (slow, to choose the quanta)
 
 # D - Time of Arrival (ToA)
 ENABLE_TOA_CONSTRAINT = True
@@ -46,23 +66,43 @@ MAX_ARRIVAL_HOURS = 7.50
 
 
 # Pysics adapter
-def physics_adapter(u_id, waypoint_i, waypoint_j, current_weight_kg, current_time):
+def physics_adapter(u_id, waypoint_i, waypoint_j, current_weight_kg, current_time, v_id=None, edge_geometry=None, edge_cost_fn=get_edge_cost, wind_ids=None):
     """
     For every possible edge we calculate:
         1. Fuel used (based on weight/wind).
         2. Time taken (Distance / Groundspeed).
         3. Financial cost.
+
+    Distance, heading and ANSP cost come from edge_geometry when it is given.
+    edge_cost_fn can be an EdgeCostMemo instead of the exact get_edge_cost.
+    wind_ids maps node IDs to wind waypoints, for grids other than the one of the wind data.
     """
-    fuel_burn, time_h, total_cost = get_edge_cost(
+    fuel_burn, time_h, total_cost = edge_cost_fn(
         waypoint_i=waypoint_i,
         waypoint_j=waypoint_j,
         waypoint_i_id=u_id,
         current_weight_kg=current_weight_kg,
-        current_time=current_time
+        current_time=current_time,
+        waypoint_j_id=v_id,
+        edge_geometry=edge_geometry,
+        wind_id=None if wind_ids is None else wind_ids[u_id]
     )
     return fuel_burn, time_h, total_cost
 
 
+def build_heuristic(edge_geometry, end_node_id, wind_ids=None):
+    """
+    Lower bound of the cost from every node to the destination, for A*.
+
+    Every edge is bounded by the strongest wind as tail wind and the lowest fuel flow
+    between the dry weight and the start weight (EdgeCostBound), plus its ANSP cost.
+    One reverse pass over the ring DAG sums these up to the destination.
+    """
+    bound = EdgeCostBound(weight_min=MIN_DRY_WEIGHT_KG, weight_max=INITIAL_WEIGHT_KG)
+    edge_costs = bound.edge_costs(edge_geometry, wind_ids)
+    return cost_to_go(edge_geometry.sources, edge_geometry.targets, edge_costs, end_node_id).tolist()
+
+
 # Main script
 def main():
     print(f"INITIALIZING DIJKSTRA OPTIMIZATION")
@@ -79,56 +119,92 @@ def main():
         print(f"ToA Not active")
         final_time_range = None
 
-    # 1. Generate the grid
-    print("\nGenerating the grid...")
-    nodes, node_coords = generate_grid(
-        origin=SCHIPHOL,
-        destination=JFK,
-        n_rings=N_RINGS,
-        n_angles=N_ANGLES,
-        ring_spacing_km=RING_SPACING_KM,
-        max_width_km=MAX_WIDTH_KM,
-        base_width_m=BASE_WIDTH_M
-    )
-    print(f"Grid Generated: {len(nodes)} nodes.")
-
-    # 2. Build the graph
-    print("Building the adjacency List...")
-    graph = build_adjacency_list(
-        # We define which dots are reachable from the current dot.
-        node_coords=node_coords,
-        n_rings=N_RINGS,
-        n_angles=N_ANGLES,
-        edge_cost_fn=lambda a, b: 0.0 # for now we are only concerned with the actual connections between the nodes this
-        # is just a placeholder
-    )
+    edge_geometry = EdgeGeometryTable() # distance, heading and ANSP cost per edge, filled once here
+
+    if USE_GRAPH_CACHE:
+        # 1 + 2. Grid and graph from the cache (one file read, generated and stored on the first run)
+        print("\nLoading the grid from the graph cache...")
+        grid_graph = cached_grid_graph(
+            SCHIPHOL, JFK, N_RINGS, N_ANGLES, RING_SPACING_KM, MAX_WIDTH_KM, BASE_WIDTH_M,
+            edge_geometry=edge_geometry
+        )
+        node_coords = grid_graph.to_node_coords()
+        nodes = list(node_coords.values())
+        graph = grid_graph.to_adjacency_list()
+        print(f"Grid Loaded: {len(nodes)} nodes.")
+    else:
+        # 1. Generate the grid
+        print("\nGenerating the grid...")
+        nodes, node_coords = generate_grid(
+            origin=SCHIPHOL,
+            destination=JFK,
+            n_rings=N_RINGS,
+            n_angles=N_ANGLES,
+            ring_spacing_km=RING_SPACING_KM,
+            max_width_km=MAX_WIDTH_KM,
+            base_width_m=BASE_WIDTH_M
+        )
+        print(f"Grid Generated: {len(nodes)} nodes.")
+
+        # 2. Build the graph
+        print("Building the adjacency List...")
+        graph = build_adjacency_list(
+            # We define which dots are reachable from the current dot.
+            node_coords=node_coords,
+            n_rings=N_RINGS,
+            n_angles=N_ANGLES,
+            edge_cost_fn=lambda a, b: 0.0, # for now we are only concerned with the actual connections between the nodes this
+            # is just a placeholder
+            edge_geometry=edge_geometry
+        )
+
     # some error handling (check if the graph is empty)
     if len(graph) == 0:
         print("Error: Graph is empty.")
         return
 
 
+    edge_cost_fn = get_edge_cost
+    if MEMO_EDGE_COSTS:
+        edge_cost_fn = EdgeCostMemo(MEMO_SIZE, MEMO_TIME_QUANTUM_H, MEMO_WEIGHT_QUANTUM_KG, check_error=MEMO_CHECK_ERROR)
+
     print("\n Starting Dijkstra")
     t_start = time.time() # for timing
 
+    heuristic = None
+    if USE_A_STAR:
+        heuristic = build_heuristic(edge_geometry, len(nodes) - 1)
+
     # 3. Call dijkstra
-    path, cost, states_visited = solve_dynamic_dijkstra(
-        adjacency_list=graph,
-        node_coords=node_coords,
-        start_node_id=0,
-        end_node_id=len(nodes) - 1,
-        initial_weight_kg=INITIAL_WEIGHT_KG,
-        start_time_sec=START_TIME_SEC,
-        physics_engine_fn=physics_adapter,
-        time_bin_sec=TIME_BIN_SEC,
-        target_time_range_sec=final_time_range
-    )
+    trace = BinaryTraceFile(SEARCH_TRACE_FILE) if SEARCH_TRACE_FILE else None
+    try:
+        path, cost, states_visited = solve_dynamic_dijkstra(
+            adjacency_list=graph,
+            node_coords=node_coords,
+            start_node_id=0,
+            end_node_id=len(nodes) - 1,
+            initial_weight_kg=INITIAL_WEIGHT_KG,
+            start_time_sec=START_TIME_SEC,
+            physics_engine_fn=partial(physics_adapter, edge_geometry=edge_geometry, edge_cost_fn=edge_cost_fn),
+            time_bin_sec=TIME_BIN_SEC,
+            target_time_range_sec=final_time_range,
+            heuristic=heuristic,
+            epsilon_cost=PARETO_EPSILON_COST,
+            epsilon_weight=PARETO_EPSILON_WEIGHT,
+            neighbor_bins=PARETO_NEIGHBOR_BINS,
+            trace=trace
+        )
+    finally:
+        if trace is not None:
+            trace.close() # writes the last block of the trace
 
     #stop the time
     t_end = time.time()
     runtime = t_end - t_start
     print(f"Computation Time: {runtime:.4f} seconds")
     print(f"States visited: {states_visited}")
+    if MEMO_EDGE_COSTS:
+        print(f"Edge cost memo: {edge_cost_fn.stats()}") # hit rate, and the worst errors if MEMO_CHECK_ERROR is on
 
     # 4. Save results for further analysis en visualization some are for specefic website to visualize the grid
     if path:
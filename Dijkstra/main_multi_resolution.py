@@ -0,0 +1,87 @@
+import sys
+import os
+import io
+import time
+import contextlib
+from functools import partial
+
+"""
+main_multi_resolution.py runs Dijkstra coarse-to-fine.
+
+it solves on the normal grid first, then builds a narrow corridor with finer rings and angles around
+the cheapest route so far and solves again, once per level in LEVELS. A finer level is not always cheaper,
+so the cheapest route of all levels is saved. The fine resolution is only used near the route, so it needs a fraction of the states of a full fine grid. The corridor nodes are not on the waypoints of
+the wind data, so they use the wind of the nearest wind waypoint.
+"""
+
+# Paths
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
+# Import
+from src.multi_resolution import CoarseGrid, CorridorLevel, solve_multi_resolution, best_result
+from weather.weather_model import get_wind_ids
+from Dijkstra.main_dijkstra import (
+    physics_adapter, build_heuristic, USE_A_STAR, SCHIPHOL, JFK, N_RINGS, N_ANGLES, RING_SPACING_KM, MAX_WIDTH_KM, BASE_WIDTH_M,
+    INITIAL_WEIGHT_KG, START_TIME_SEC, TIME_BIN_SEC, ENABLE_TOA_CONSTRAINT, MIN_ARRIVAL_HOURS, MAX_ARRIVAL_HOURS
+)
+
+# Refinement levels: (ring spacing in km, angles per ring, half width of the corridor in km)
+LEVELS = [
+    CorridorLevel(100.0, 21, 150.0),
+    CorridorLevel(50.0, 21, 60.0),
+]
+
+
+def make_physics_fn(node_coords, edge_geometry):
+    # Every level has its own nodes, so its own geometry table and wind waypoints
+    return partial(physics_adapter, edge_geometry=edge_geometry, wind_ids=get_wind_ids(node_coords))
+
+
+def make_heuristic(node_coords, edge_geometry):
+    # The lower bound per edge also uses the wind of the nearest wind waypoint
+    return build_heuristic(edge_geometry, max(node_coords.keys()), wind_ids=get_wind_ids(node_coords))
+
+
+def main():
+    print("INITIALIZING MULTI-RESOLUTION DIJKSTRA")
+    final_time_range = None
+    if ENABLE_TOA_CONSTRAINT:
+        final_time_range = (MIN_ARRIVAL_HOURS * 3600.0, MAX_ARRIVAL_HOURS * 3600.0)
+
+    t_start = time.time()
+    with contextlib.redirect_stdout(io.StringIO()): # the solver prints a report per level, we print our own summary
+        results = solve_multi_resolution(
+            origin=SCHIPHOL,
+            destination=JFK,
+            coarse=CoarseGrid(N_RINGS, N_ANGLES, RING_SPACING_KM, MAX_WIDTH_KM, BASE_WIDTH_M),
+            levels=LEVELS,
+            make_physics_fn=make_physics_fn,
+            initial_weight_kg=INITIAL_WEIGHT_KG,
+            start_time_sec=START_TIME_SEC,
+            time_bin_sec=TIME_BIN_SEC,
+            target_time_range_sec=final_time_range,
+            make_heuristic_fn=make_heuristic if USE_A_STAR else None
+        )
+    runtime = time.time() - t_start
+
+    if not results:
+        print("\nOptimization Failed: No path found.")
+        return
+
+    for level, result in enumerate(results):
+        print(f"Level {level}: {result.n_nodes} nodes, {result.states} states, cost €{result.cost:.2f}")
+    best = best_result(results) # a finer level is not always cheaper, keep the best route
+    print(f"Best route: level {results.index(best)}, cost €{best.cost:.2f}")
+    print(f"Computation Time: {runtime:.4f} seconds")
+    print(f"States visited: {sum(result.states for result in results)}")
+
+    with open("solution_path_multi_resolution.txt", "w") as f:
+        for lat, lon in best.path_coords:
+            f.write(f"{lat}, {lon}\n")
+    print("Results saved.")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,11 +6,10 @@ Then, the function get edge costs combines all this to determine the cost of an
 
 from src.vinc import v_direct
 import math
-from dataframe_filtering.determining_ff import get_fuel_flow
-import pandas as pd
+import numpy as np
+from dataframe_filtering.determining_ff import fuel_flow_ac1
 from src.ansp import get_ansp_cost_for_edge
-from weather.weather_model import get_wind_kmh
-from pathlib import Path
+from weather.weather_model import get_wind_kmh, get_wind_field
 
 """
 Our fixed variables are listed below
@@ -30,30 +29,8 @@ TIME_MIN = 7.0 #this is the time window for the aircraft. this is the minimum fl
 TIME_MAX_AC2 = 7.85 #this is the time window for the aircraft 2. this is the maximum flight time. it is later than for ac1 because ac 2 has a lower TAS
 TIME_MIN_AC2 = 7.35 #this is the time window for the aircraft 2. this is the minimum flight time
 
-project_root = Path(__file__).resolve().parents[1]  #to read a csv file from another directory
-
-csv_path = project_root / 'weather' / 'wind_for_coordinates.csv' #make the path
-
-wind = pd.read_csv(csv_path) #read the dataframe of the wind. later used by the weather model
-
-
-u_table = wind.pivot(index='time_hours', columns='waypoint_id', values='u_speed_ms').sort_index() #make a table for the u wind on every hour. now, the time are the rows and the waypoint IDs are the columns
-v_table = wind.pivot(index='time_hours', columns='waypoint_id', values='v_speed_ms').sort_index() #make a table for the v wind on every hour. now, the time are the rows and the waypoint IDs are the columns
-
-
-
-
-
-
-"""
-Below is uur aircraft Performance database with weight and fuel flow converted into a list
-"""
-csv_path2 = project_root / 'dataframe_filtering' / 'Aircraft_1_filtered.csv' #make the path
-df = pd.read_csv(csv_path2)
-
-weight_table = df['Gross_Weight'].tolist()
-ff_table = df['fuel_flow'].tolist() #create the tables again because the fuel flow function uses weight and fuel flow tables.
-
+#the wind is not read here. the weather model loads it once (on first use) and every module shares that copy.
+#our aircraft Performance database (weight and fuel flow) is loaded once as a FuelFlowModel in dataframe_filtering/determining_ff.py
 
 
 """
@@ -121,19 +98,32 @@ def get_edge_cost(
     waypoint_i_id, #the id of the waypoint
     current_weight_kg, #current weight of the aircraft somewhere in the graph
     current_time, #the time. expressed in hours from 1-13-2026 18.00 UTC. used by the weather model
+    waypoint_j_id = None, #the id of the second waypoint. only needed to look the edge up in edge_geometry
+    edge_geometry = None, #optional EdgeGeometryTable (src/edge_geometry.py) with the precomputed distance, heading and ANSP costs of every edge
+    wind_id = None, #the waypoint id in the wind data, if it is not the same as waypoint_i_id (grids other than the one of the wind csv, see get_wind_ids)
 ): #create the function
 
-    distance_km = get_distance(waypoint_i, waypoint_j) #calculate the distance with the function
+    geometry = None
+    if edge_geometry is not None and waypoint_j_id is not None:
+        geometry = edge_geometry.get((waypoint_i_id, waypoint_j_id)) #the geometry never changes during a search, so it is looked up instead of calculated
 
-    heading_deg = get_heading(waypoint_i, waypoint_j) #calculate the heading with the function
+    if geometry is not None:
+        distance_km = geometry.distance_km
+        heading_deg = geometry.heading_deg
+    else:
+        distance_km = get_distance(waypoint_i, waypoint_j) #calculate the distance with the function
 
-    head_tail_kmh = get_wind_kmh(waypoint_i_id, current_time, heading_deg) #calculate the head or tail wind with the weather model in the weather directory
+        heading_deg = get_heading(waypoint_i, waypoint_j) #calculate the heading with the function
+
+    if wind_id is None:
+        wind_id = waypoint_i_id
+    head_tail_kmh = get_wind_kmh(wind_id, current_time, heading_deg) #calculate the head or tail wind with the weather model in the weather directory
 
     ground_speed_kmh = get_ground_speed(MACH_AIRCRAFT_1, TEMPERATURE_HEIGHT, head_tail_kmh)
     #calculate the ground speed with the function
     time_h = get_time(distance_km, ground_speed_kmh) #calculate the time with the function
 
-    fuel_flow_kg_per_h = get_fuel_flow(current_weight_kg, weight_table, ff_table)
+    fuel_flow_kg_per_h = fuel_flow_ac1(current_weight_kg)
     #calculate the fuel flow by the interpolation function in te dataframe_filtering directory
     fuel_burn_kg = get_fuel_burn(fuel_flow_kg_per_h, time_h)
     #calculate the fuel burn with the function
@@ -141,12 +131,58 @@ def get_edge_cost(
     fuel_cost = get_fuel_costs(fuel_burn_kg, FUEL_COSTS_PER_KG) #calculate the fuel costs of the edge with the function
     time_cost = get_cost_of_time(time_h, COST_OF_TIME_INDEX, FUEL_COSTS_PER_KG) #calculate the cost of time with the function
 
-    ansp_cost = get_ansp_cost_for_edge(waypoint_i, waypoint_j) #calcultate the ansp costs with the function defined in the src directory
+    if geometry is not None:
+        ansp_cost = geometry.ansp_eur #precomputed in the edge geometry table
+    else:
+        ansp_cost = get_ansp_cost_for_edge(waypoint_i, waypoint_j) #calcultate the ansp costs with the function defined in the src directory
 
     total_cost_edge = fuel_cost + time_cost + ansp_cost
     #Total cost of the edge. Here, the ANSP costs is missing. omer is still performing research on the topic.
     return fuel_burn_kg, time_h, total_cost_edge
 
+"""
+The same calculation for many edges at once. Every optimizer spends most of its time in get_edge_cost,
+so this batch version evaluates for example a whole ABC population or a whole Dijkstra expansion in one go.
+the helper functions above work on numpy arrays as well, so the physics is exactly the same.
+"""
+
+def get_edge_cost_batch(
+    source_ids, #array with the id of the first waypoint of every edge
+    target_ids, #array with the id of the second waypoint of every edge
+    current_weight_kg, #array with the weight at the start of every edge, or one weight for all of them (one state fanned out)
+    current_time, #array with the time (hours from 1-13-2026 18.00 UTC) at the start of every edge, or one time for all of them
+    edge_geometry, #the EdgeGeometryTable of the graph, filled by build_adjacency_list
+    wind_ids = None, #the waypoint ids in the wind data, if they are not the same as source_ids
+    rows = None, #optional rows of the edges in edge_geometry (edge_geometry.edge_index), if they were already looked up
+): #create the function
+
+    source_ids = np.asarray(source_ids, dtype=np.int64)
+    target_ids = np.asarray(target_ids, dtype=np.int64)
+    if wind_ids is None:
+        wind_ids = source_ids
+    current_weight_kg = np.broadcast_to(np.asarray(current_weight_kg, dtype=float), source_ids.shape) #a scalar weight is used for every edge
+    current_time = np.broadcast_to(np.asarray(current_time, dtype=float), source_ids.shape)
+
+    if rows is None:
+        rows = edge_geometry.edge_index(source_ids, target_ids) #where the edges are in the geometry table
+    distance_km = edge_geometry.distance_km[rows]
+    heading_deg = edge_geometry.heading_deg[rows]
+    ansp_cost = edge_geometry.ansp_eur[rows]
+
+    head_tail_kmh = get_wind_field().head_tail_kmh(wind_ids, current_time, heading_deg) #all the head or tail winds in one lookup
+
+    ground_speed_kmh = get_ground_speed(MACH_AIRCRAFT_1, TEMPERATURE_HEIGHT, head_tail_kmh)
+    time_h = get_time(distance_km, ground_speed_kmh)
+
+    fuel_flow_kg_per_h = fuel_flow_ac1(current_weight_kg) #the fuel flow model also takes arrays
+    fuel_burn_kg = get_fuel_burn(fuel_flow_kg_per_h, time_h)
+
+    fuel_cost = get_fuel_costs(fuel_burn_kg, FUEL_COSTS_PER_KG)
+    time_cost = get_cost_of_time(time_h, COST_OF_TIME_INDEX, FUEL_COSTS_PER_KG)
+
+    total_cost_edge = fuel_cost + time_cost + ansp_cost
+    return fuel_burn_kg, time_h, total_cost_edge
+
 """
 To see if it works, here is a sample, remove the quotes at the end
 
@@ -0,0 +1,138 @@
+"""
+Lower bounds of edge costs.
+
+An edge can never be flown faster than with the strongest wind of its first waypoint straight from behind,
+and the fuel flow is never lower than the lowest fuel flow of all weights the aircraft can have during the cruise.
+With these two, every edge has a cost it can never be cheaper than. evaluate_trajectory uses the sum of these bounds
+over the edges it still has to fly, so it can stop a trajectory that can't beat a cutoff anymore.
+
+cost of an edge = time * (fuel flow + cost index) * fuel price + ANSP costs, so the bound is
+lower bound = distance / (TAS + highest wind) * (lowest fuel flow + cost index) * fuel price + ANSP costs
+"""
+
+from weakref import WeakKeyDictionary
+
+import numpy as np
+
+from dataframe_filtering.determining_ff import fuel_flow_ac1
+from weather.weather_model import get_wind_field
+from Trajectory.edge_cost_aircraft1 import (
+    get_ground_speed, get_distance, MACH_AIRCRAFT_1, TEMPERATURE_HEIGHT, COST_OF_TIME_INDEX, FUEL_COSTS_PER_KG,
+    WEIGHT_START_CRUISE, FUEL_BURN_MAX, TIME_MAX,
+)
+from src.ansp import get_ansp_cost_for_edge
+
+
+class EdgeCostBound:
+
+    def __init__(
+        self,
+        fuel_flow_model = fuel_flow_ac1, #the fuel flow of the aircraft
+        wind_field = None, #the WindField. None means the shared one of the weather model (loaded on first use)
+        weight_min = WEIGHT_START_CRUISE - FUEL_BURN_MAX, #lowest weight of a trajectory without the fuel penalty
+        weight_max = WEIGHT_START_CRUISE, #the aircraft never gets heavier than at the start
+    ):
+        self.tas_kmh = get_ground_speed(MACH_AIRCRAFT_1, TEMPERATURE_HEIGHT, 0.0) #the true airspeed, ground speed without wind
+        self.min_fuel_flow = max(fuel_flow_model.min_fuel_flow(weight_min, weight_max), 0.0)
+        self._wind_field = wind_field
+        self._max_wind_list = None
+        self._tables = WeakKeyDictionary() #EdgeGeometryTable -> (time bounds, ANSP costs) of all its edges
+
+    @property
+    def max_wind_kmh(self):
+        if self._wind_field is None:
+            self._wind_field = get_wind_field()
+        return self._wind_field.max_speed_kmh() #highest wind speed of every wind waypoint
+
+    def edge_time(self, distance_km, wind_ids):
+        """
+        The shortest possible flight time (hours) of edges, with the strongest wind as tail wind. works for arrays as well.
+        """
+        return distance_km / (self.tas_kmh + self.max_wind_kmh[wind_ids])
+
+    def table_bounds(self, edge_geometry, wind_ids = None):
+        """
+        Time bound and ANSP costs of every edge of an EdgeGeometryTable, as arrays in the order of the table.
+        calculated once per table (if the wind ids are the node ids).
+        """
+        if wind_ids is None and edge_geometry in self._tables:
+            return self._tables[edge_geometry]
+
+        sources = edge_geometry.sources if wind_ids is None else np.asarray(wind_ids)[edge_geometry.sources]
+        bounds = (self.edge_time(edge_geometry.distance_km, sources), edge_geometry.ansp_eur)
+        if wind_ids is None:
+            self._tables[edge_geometry] = bounds
+        return bounds
+
+    def edge_costs(self, edge_geometry, wind_ids = None):
+        """
+        Lower bound of the costs (€) of every edge of an EdgeGeometryTable, in the order of the table.
+        """
+        time_h, ansp_eur = self.table_bounds(edge_geometry, wind_ids)
+        return self.cost(time_h, ansp_eur)
+
+    def trajectory_bounds(self, trajectory, node_coordinates, edge_geometry = None, start = 0):
+        """
+        For every node of the trajectory, the lowest flight time and the ANSP costs of the rest of the trajectory
+        (from that node to the end). two lists with one value per node, the last one is 0.0.
+        only the nodes from start on are calculated (the nodes before are left at 0.0).
+        """
+        n = len(trajectory)
+        remaining_time = [0.0] * n
+        remaining_ansp = [0.0] * n
+        if n < 2:
+            return remaining_time, remaining_ansp
+
+        if self._max_wind_list is None:
+            self._max_wind_list = self.max_wind_kmh.tolist() #python floats are faster to look up one by one
+        max_wind_kmh = self._max_wind_list
+        time_h = 0.0
+        ansp_eur = 0.0
+        for i in range(n - 2, start - 1, -1): #from the end back to the start
+            node_i = trajectory[i]
+            node_j = trajectory[i + 1]
+            geometry = edge_geometry.get((node_i, node_j)) if edge_geometry is not None else None
+            if geometry is not None:
+                distance_km = geometry.distance_km
+                ansp_edge = geometry.ansp_eur
+            else:
+                distance_km = get_distance(node_coordinates[node_i], node_coordinates[node_j]) #not in the table, calculate it like get_edge_cost does
+                ansp_edge = get_ansp_cost_for_edge(node_coordinates[node_i], node_coordinates[node_j])
+
+            time_h += distance_km / (self.tas_kmh + max_wind_kmh[node_i])
+            ansp_eur += ansp_edge
+            remaining_time[i] = time_h
+            remaining_ansp[i] = ansp_eur
+        return remaining_time, remaining_ansp
+
+    def cost(self, time_h, ansp_eur, fuel_flow = None):
+        """
+        Lowest costs (€) for a flight time bound and ANSP costs. works for arrays as well.
+        """
+        if fuel_flow is None:
+            fuel_flow = self.min_fuel_flow
+        return time_h * (fuel_flow + COST_OF_TIME_INDEX) * FUEL_COSTS_PER_KG + ansp_eur
+
+    def remaining_cost(self, total_fuel, total_time, remaining_time, remaining_ansp):
+        """
+        The lowest costs still to come for a trajectory that burned total_fuel and flew total_time so far,
+        including the penalties that can't be avoided anymore (the fuel and the flight time only grow).
+        """
+        penalty = 0.0
+        if total_time + remaining_time > TIME_MAX:
+            penalty += 1e12 #it will arrive too late, whatever the wind does
+
+        if total_fuel > FUEL_BURN_MAX:
+            return self.cost(remaining_time, remaining_ansp, 0.0) + penalty + 1e12 #the aircraft can be lighter than weight_min now, so no fuel flow bound
+
+        return self.cost(remaining_time, remaining_ansp) + penalty #if the fuel runs over later, that costs 1e12 more anyway
+
+
+_edge_cost_bound = None
+
+
+def get_edge_cost_bound():
+    global _edge_cost_bound
+    if _edge_cost_bound is None:
+        _edge_cost_bound = EdgeCostBound() #the bound of aircraft 1, made once on first use
+    return _edge_cost_bound
@@ -0,0 +1,126 @@
+"""
+Memoization of edge costs.
+
+Dijkstra and the bee colony ask for the same edge at almost the same time and weight over and over again.
+EdgeCostMemo puts a bounded LRU cache in front of get_edge_cost. The key is the edge plus the time and weight
+rounded to a quantum chosen by the user, and the cost is calculated at that rounded time and weight.
+So the answer does not depend on which state asked first, and the error is only caused by the rounding.
+
+The memo keeps track of its hit rate. With check_error=True it also calculates the exact answer on every hit
+and remembers the largest difference, so you can choose quanta that stay within your tolerance.
+"""
+
+from collections import OrderedDict
+
+from Trajectory.edge_cost_aircraft1 import get_edge_cost
+
+
+class EdgeCostMemo:
+
+    def __init__(
+        self,
+        maxsize = 200_000, #maximum amount of remembered edge costs. None means no limit
+        time_quantum_h = 1.0 / 60.0, #time is rounded to this (hours). 1 minute by default
+        weight_quantum_kg = 50.0, #weight is rounded to this (kg)
+        edge_cost_fn = get_edge_cost, #the exact function, same arguments as get_edge_cost
+        check_error = False, #if True, every hit is compared with the exact value (slow, only to choose the quanta)
+    ):
+        if time_quantum_h <= 0 or weight_quantum_kg <= 0:
+            raise ValueError("the quanta for time and weight should be positive")
+
+        self.maxsize = maxsize
+        self.time_quantum_h = time_quantum_h
+        self.weight_quantum_kg = weight_quantum_kg
+        self.edge_cost_fn = edge_cost_fn
+        self.check_error = check_error
+
+        self._cache = OrderedDict() #key -> (fuel, time, cost). the order is the LRU order
+        self.hits = 0
+        self.misses = 0
+        self.checked = 0 #amount of hits compared with the exact value
+        self.max_fuel_error_kg = 0.0
+        self.max_time_error_h = 0.0
+        self.max_cost_error_eur = 0.0
+
+    def __call__(
+        self,
+        waypoint_i,
+        waypoint_j,
+        waypoint_i_id,
+        current_weight_kg,
+        current_time,
+        waypoint_j_id = None,
+        edge_geometry = None,
+        wind_id = None,
+    ): #same arguments as get_edge_cost, so it can be used instead of it
+        time_bucket = round(current_time / self.time_quantum_h)
+        weight_bucket = round(current_weight_kg / self.weight_quantum_kg)
+        edge = (waypoint_i_id, waypoint_j_id) if waypoint_j_id is not None else (waypoint_i_id, waypoint_j)
+        key = (edge, time_bucket, weight_bucket)
+
+        result = self._cache.get(key)
+        if result is not None:
+            self.hits += 1
+            self._cache.move_to_end(key) #most recently used
+            if self.check_error:
+                self._compare(result, waypoint_i, waypoint_j, waypoint_i_id, current_weight_kg, current_time, waypoint_j_id, edge_geometry, wind_id)
+            return result
+
+        self.misses += 1
+        result = self.edge_cost_fn(
+            waypoint_i,
+            waypoint_j,
+            waypoint_i_id,
+            weight_bucket * self.weight_quantum_kg, #calculated at the rounded weight and time
+            time_bucket * self.time_quantum_h,
+            waypoint_j_id=waypoint_j_id,
+            edge_geometry=edge_geometry,
+            wind_id=wind_id,
+        )
+        self._cache[key] = result
+        if self.maxsize is not None and len(self._cache) > self.maxsize:
+            self._cache.popitem(last=False) #forget the least recently used edge cost
+        if self.check_error:
+            self._compare(result, waypoint_i, waypoint_j, waypoint_i_id, current_weight_kg, current_time, waypoint_j_id, edge_geometry, wind_id)
+        return result
+
+    def _compare(self, result, waypoint_i, waypoint_j, waypoint_i_id, current_weight_kg, current_time, waypoint_j_id, edge_geometry, wind_id):
+        exact = self.edge_cost_fn(
+            waypoint_i,
+            waypoint_j,
+            waypoint_i_id,
+            current_weight_kg,
+            current_time,
+            waypoint_j_id=waypoint_j_id,
+            edge_geometry=edge_geometry,
+            wind_id=wind_id,
+        )
+        self.checked += 1
+        self.max_fuel_error_kg = max(self.max_fuel_error_kg, abs(result[0] - exact[0]))
+        self.max_time_error_h = max(self.max_time_error_h, abs(result[1] - exact[1]))
+        self.max_cost_error_eur = max(self.max_cost_error_eur, abs(result[2] - exact[2]))
+
+    @property
+    def hit_rate(self):
+        calls = self.hits + self.misses
+        return self.hits / calls if calls else 0.0
+
+    def stats(self):
+        """
+        Hit rate and (if check_error is on) the worst errors compared to the exact evaluation.
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hit_rate,
+            "size": len(self._cache),
+            "checked": self.checked,
+            "max_fuel_error_kg": self.max_fuel_error_kg,
+            "max_time_error_h": self.max_time_error_h,
+            "max_cost_error_eur": self.max_cost_error_eur,
+        }
+
+    def clear(self):
+        self._cache.clear()
+        self.hits = self.misses = self.checked = 0
+        self.max_fuel_error_kg = self.max_time_error_h = self.max_cost_error_eur = 0.0
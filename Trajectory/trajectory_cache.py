@@ -0,0 +1,239 @@
+"""
+Cache of trajectory evaluations.
+
+The bee colony runs 30 seeds for 31 start times, and keeps evaluating the same trajectories at the same t_start.
+TrajectoryCache remembers the result of get_trajectory_cost for a (trajectory, t_start) and a model version.
+It has two levels: a bounded LRU in memory, and (optional) an sqlite file on disk. The file is shared by all runs and all
+worker processes, so a new sweep after a small change of for example the bee parameters reuses almost all evaluations.
+
+The model version is a hash of everything that determines the result besides the trajectory and t_start: the aircraft
+constants, the fuel flow table, the wind sources, the ANSP rates and the coordinates of the grid. if one of these changes,
+the old results are simply not found anymore. Bump MODEL_VERSION when the physics itself changes.
+"""
+
+import hashlib
+import os
+import sqlite3
+from collections import OrderedDict
+from pathlib import Path
+
+from Trajectory.edge_cost_aircraft1 import (
+    get_edge_cost, MACH_AIRCRAFT_1, TEMPERATURE_HEIGHT, COST_OF_TIME_INDEX, FUEL_COSTS_PER_KG,
+    WEIGHT_START_CRUISE, FUEL_BURN_MAX, TIME_MIN, TIME_MAX,
+)
+from Trajectory.trajectory_cost_ac1 import get_trajectory_cost, evaluate_trajectory, TrajectoryEvaluation
+from dataframe_filtering.determining_ff import fuel_flow_ac1
+from weather.weather_model import get_source_hash
+
+project_root = Path(__file__).resolve().parents[1]
+CACHE_PATH = project_root / 'trajectory_cache' / 'trajectories.sqlite' #default file of the disk level
+
+MODEL_VERSION = 1 #change this when the calculation of the costs changes, so old results are not used anymore
+
+
+def get_model_version(node_coordinates):
+    """
+    Fingerprint of the cost model and the grid. results with another fingerprint are never used.
+    """
+    h = hashlib.sha256()
+    h.update(repr((
+        MODEL_VERSION,
+        MACH_AIRCRAFT_1, TEMPERATURE_HEIGHT, COST_OF_TIME_INDEX, FUEL_COSTS_PER_KG,
+        WEIGHT_START_CRUISE, FUEL_BURN_MAX, TIME_MIN, TIME_MAX,
+        fuel_flow_ac1.weights, fuel_flow_ac1.fuel_flows,
+    )).encode())
+    h.update(get_source_hash().encode()) #the wind csv and GRIB files
+    h.update((project_root / 'src' / 'ansp.py').read_bytes()) #the ANSP regions and rates are in the code
+    h.update(repr(sorted(node_coordinates.items())).encode()) #the same node IDs mean other routes on another grid
+    return h.hexdigest()
+
+
+class TrajectoryCache:
+
+    def __init__(
+        self,
+        maxsize = 100_000, #maximum amount of results in memory. None means no limit
+        path = None, #sqlite file for the disk level (for example CACHE_PATH). None means only memory
+        model_version = None, #fixed model version. None means get_model_version of the grid (calculated once per grid)
+        flush_every = 200, #new results are written to disk in groups of this size
+    ):
+        self.maxsize = maxsize
+        self.path = None if path is None else Path(path)
+        self.model_version = model_version
+        self.flush_every = flush_every
+
+        self._cache = OrderedDict() #key -> (total_cost, total_fuel, total_time, weight). the order is the LRU order
+        self._versions = {} #id of a node_coordinates dictionary -> (the dictionary, its model version)
+        self._pending = [] #results that are not on disk yet
+        self._connection = None
+        self._pid = None #the process that opened the connection. a forked worker opens its own
+
+        self.hits = 0 #found in memory
+        self.disk_hits = 0 #found on disk
+        self.misses = 0 #calculated
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_connection'] = None #every process opens its own connection to the file
+        state['_pid'] = None
+        state['_pending'] = []
+        return state
+
+    def _version(self, node_coordinates):
+        if self.model_version is not None:
+            return self.model_version
+        known = self._versions.get(id(node_coordinates))
+        if known is None or known[0] is not node_coordinates:
+            known = (node_coordinates, get_model_version(node_coordinates)) #hashing the grid takes a while, so once per grid
+            self._versions[id(node_coordinates)] = known
+        return known[1]
+
+    def key(self, trajectory, node_coordinates, t_start):
+        """
+        Content address of a result: a hash of the model version, t_start and the node IDs.
+        """
+        text = f"{self._version(node_coordinates)}|{float(t_start)!r}|{','.join(map(str, trajectory))}"
+        return hashlib.sha256(text.encode()).hexdigest()
+
+    def _db(self):
+        if self.path is None:
+            return None
+        if self._connection is None or self._pid != os.getpid():
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=60.0) #wait for other processes that are writing
+            connection.execute('PRAGMA journal_mode=WAL') #readers never wait for a writer
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS evaluations ('
+                'key TEXT PRIMARY KEY, total_cost REAL, total_fuel REAL, total_time REAL, weight REAL)'
+            )
+            connection.commit()
+            self._connection = connection
+            self._pid = os.getpid()
+            self._pending = []
+        return self._connection
+
+    def _remember(self, key, result):
+        self._cache[key] = result
+        if self.maxsize is not None and len(self._cache) > self.maxsize:
+            self._cache.popitem(last=False) #forget the least recently used result
+
+    def get(self, trajectory, node_coordinates, t_start = 0.0):
+        """
+        The cached (total_cost, total_fuel, total_time, weight) of a trajectory, or None if it was never calculated.
+        """
+        key = self.key(trajectory, node_coordinates, t_start)
+        result = self._cache.get(key)
+        if result is not None:
+            self.hits += 1
+            self._cache.move_to_end(key) #most recently used
+            return result
+
+        db = self._db()
+        if db is not None:
+            row = db.execute(
+                'SELECT total_cost, total_fuel, total_time, weight FROM evaluations WHERE key = ?', (key,)
+            ).fetchone()
+            if row is not None:
+                self.disk_hits += 1
+                result = tuple(row)
+                self._remember(key, result)
+                return result
+
+        self.misses += 1
+        return None
+
+    def put(self, trajectory, node_coordinates, t_start, result):
+        """
+        Remember the result of get_trajectory_cost (not of an evaluation that stopped early, that is only a bound).
+        """
+        key = self.key(trajectory, node_coordinates, t_start)
+        result = tuple(float(x) for x in result)
+        self._remember(key, result)
+        if self._db() is not None:
+            self._pending.append((key,) + result)
+            if len(self._pending) >= self.flush_every:
+                self.flush()
+
+    def flush(self):
+        """
+        Write the new results to disk, so other processes can use them.
+        """
+        if self._connection is None or not self._pending or self._pid != os.getpid():
+            return
+        with self._connection: #one transaction, committed at the end
+            self._connection.executemany(
+                'INSERT OR IGNORE INTO evaluations VALUES (?, ?, ?, ?, ?)', self._pending
+            ) #another process may have calculated the same trajectory, the results are the same
+        self._pending = []
+
+    def close(self):
+        self.flush()
+        if self._connection is not None and self._pid == os.getpid():
+            self._connection.close()
+        self._connection = None
+        self._pid = None
+
+    def __call__(
+        self,
+        trajectory,
+        node_coordinates,
+        t_start = 0.0,
+        edge_geometry = None,
+        edge_cost_fn = get_edge_cost,
+    ): #same arguments as get_trajectory_cost, so it can be used instead of it
+        if edge_cost_fn is not get_edge_cost:
+            return get_trajectory_cost(trajectory, node_coordinates, t_start, edge_geometry, edge_cost_fn) #for example a memo with rounded values, those results are not exact
+
+        result = self.get(trajectory, node_coordinates, t_start)
+        if result is None:
+            result = get_trajectory_cost(trajectory, node_coordinates, t_start, edge_geometry)
+            self.put(trajectory, node_coordinates, t_start, result)
+        return result
+
+    def evaluate(
+        self,
+        trajectory,
+        node_coordinates,
+        t_start = 0.0,
+        edge_geometry = None,
+        edge_cost_fn = get_edge_cost,
+        parent = None,
+        cutoff = None,
+    ): #same arguments as evaluate_trajectory, so the bee colony can use it instead
+        """
+        evaluate_trajectory with the cache in front of it. A cached result has no running totals per node, so it only
+        knows the start state: a mutation of it is calculated from the start again (with exactly the same result).
+        """
+        if edge_cost_fn is not get_edge_cost:
+            return evaluate_trajectory(trajectory, node_coordinates, t_start, edge_geometry, edge_cost_fn, parent, cutoff)
+
+        result = self.get(trajectory, node_coordinates, t_start)
+        if result is not None:
+            return TrajectoryEvaluation(list(trajectory), t_start, [WEIGHT_START_CRUISE], [t_start], [0.0], [0.0], [0.0], 0, result)
+
+        evaluation = evaluate_trajectory(trajectory, node_coordinates, t_start, edge_geometry, edge_cost_fn, parent, cutoff)
+        if not evaluation.is_bound:
+            self.put(trajectory, node_coordinates, t_start, evaluation.result)
+        return evaluation
+
+    @property
+    def hit_rate(self):
+        calls = self.hits + self.disk_hits + self.misses
+        return (self.hits + self.disk_hits) / calls if calls else 0.0
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": self.hit_rate,
+            "size": len(self._cache),
+        }
+
+    def clear(self):
+        """
+        Empty the memory level and the statistics. the file on disk is kept.
+        """
+        self._cache.clear()
+        self.hits = self.disk_hits = self.misses = 0
@@ -1,4 +1,7 @@
-from Trajectory.edge_cost_aircraft1 import get_edge_cost
+import numpy as np
+from Trajectory.edge_cost_aircraft1 import get_edge_cost, get_edge_cost_batch
+from Trajectory.edge_cost_bound import get_edge_cost_bound
+from src.edge_geometry import EdgeGeometryTable
 
 """
 Our fixed variables are listed below again
@@ -19,34 +22,110 @@ TIME_MAX_AC2 = 7.85 #this is the time window for the aircraft 2. this is the max
 TIME_MIN_AC2 = 7.35 #this is the time window for the aircraft 2. this is the minimum flight time
 
 """
-Now it's time to calculate the cost of a whole trajectory 
+Now it's time to calculate the cost of a whole trajectory.
+evaluate_trajectory also keeps the running totals at every node, so mutations only have to recalculate the nodes that changed.
 """
 
-def get_trajectory_cost(
+class TrajectoryEvaluation:
+    """
+    The cost of a trajectory, together with the running totals at every node.
+
+    weights[i], times[i], fuels[i], durations[i] and costs[i] are the weight, local time, fuel burned,
+    flight time and costs (without penalties) when the aircraft is at trajectory[i].
+    Because of these, a mutated trajectory that starts with the same nodes can continue from here
+    instead of flying the whole route again (see evaluate_trajectory).
+    """
+
+    __slots__ = ('trajectory', 't_start', 'weights', 'times', 'fuels', 'durations', 'costs', 'edges_evaluated', 'result', 'is_bound')
+
+    def __init__(self, trajectory, t_start, weights, times, fuels, durations, costs, edges_evaluated, result, is_bound=False):
+        self.trajectory = trajectory
+        self.t_start = t_start
+        self.weights = weights
+        self.times = times
+        self.fuels = fuels
+        self.durations = durations
+        self.costs = costs
+        self.edges_evaluated = edges_evaluated #how many edges were calculated for this evaluation (the rest came from the parent)
+        self.result = result #(total_cost, total_fuel, total_time, weight), the same as get_trajectory_cost returns
+        self.is_bound = is_bound #True if the evaluation stopped early: result[0] is then a lower bound of the costs, the rest is the state where it stopped
+
+
+def evaluate_trajectory(
     trajectory, #this is a list of all the node (waypoint) IDs
     node_coordinates, #this is a dictionary with all the node IDs as keys and coordinates (in a tuple) as value
-    t_start = 0.0, #the starting time in hours from 1-13-2026 18.00 UTC. this is used for different starting times in different scenarios for the algorithm. if no t_start is given, 0.0 is used
+    t_start = 0.0, #the starting time in hours from 1-13-2026 18.00 UTC
+    edge_geometry = None, #optional EdgeGeometryTable filled by build_adjacency_list
+    edge_cost_fn = get_edge_cost, #the function for one edge
+    parent = None, #optional TrajectoryEvaluation of a trajectory with the same start (for example the one that was mutated)
+    cutoff = None, #optional cost. the evaluation stops as soon as the trajectory can't be cheaper than this anymore
+    edge_cost_bound = None, #the EdgeCostBound used for the cutoff (Trajectory/edge_cost_bound.py). None means the one of aircraft 1
 ): #define the function
+    """
+    Same calculation as get_trajectory_cost, but it returns a TrajectoryEvaluation.
+    If a parent is given, the nodes both trajectories have in common at the start are not calculated again:
+    the calculation continues from the state of the parent at the last common node. The result is exactly the same.
+
+    With a cutoff, before every edge the costs so far plus a lower bound of the rest (and the penalties that can't be
+    avoided anymore) are compared with the cutoff. If that is already cutoff or more, the evaluation stops and is_bound
+    is True: result[0] is then that lower bound instead of the exact costs. For example, the cost of the parent as cutoff
+    stops a mutation as soon as it can't be an improvement. cutoff=1e12 only stops trajectories that will get a penalty.
+    """
+    start = 0 #the node where the calculation starts
+    if parent is not None and parent.t_start == t_start:
+        old = parent.trajectory
+        common = 0
+        n_common_max = min(len(old), len(trajectory))
+        while common < n_common_max and old[common] == trajectory[common]:
+            common += 1 #count the nodes at the start that are the same
+        start = min(max(common - 1, 0), len(parent.weights) - 1) #the state at the last common node is known (if the parent stopped early, only up to there)
+
+    if start > 0:
+        weights = parent.weights[:start + 1] #copy the running totals up to the last common node
+        times = parent.times[:start + 1]
+        fuels = parent.fuels[:start + 1]
+        durations = parent.durations[:start + 1]
+        costs = parent.costs[:start + 1]
+    else:
+        weights = [WEIGHT_START_CRUISE] #The beginning weight
+        times = [t_start] #the current time at the start is the same as t_start
+        fuels = [0.0]
+        durations = [0.0]
+        costs = [0.0] #set all the end variables we want to know at zero.
+
+    weight = weights[-1]
+    current_time = times[-1]
+    total_fuel = fuels[-1]
+    total_time = durations[-1]
+    total_cost = costs[-1]
+
+    if cutoff is not None:
+        if edge_cost_bound is None:
+            edge_cost_bound = get_edge_cost_bound()
+        remaining_time, remaining_ansp = edge_cost_bound.trajectory_bounds(trajectory, node_coordinates, edge_geometry, start) #lowest time and ANSP costs from every node to the end
+    lower_bound = None
 
-    weight = WEIGHT_START_CRUISE #The beginning weight
-    total_cost = 0.0
-    total_fuel = 0.0
-    total_time = 0.0 #set all the end variables we want to know at zero.
-    current_time = t_start #the current time at the start is the same as t_start
+    for i in range(start, len(trajectory) - 1): #the loop is created to calculate the costs for all (remaining) edges in the trajectory
+        if cutoff is not None:
+            bound = total_cost + edge_cost_bound.remaining_cost(total_fuel, total_time, remaining_time[i], remaining_ansp[i])
+            if bound >= cutoff:
+                lower_bound = bound #this trajectory can't beat the cutoff anymore, so stop here
+                break
 
-    for i in range(len(trajectory) - 1): #the loop is created to calculate the costs for all edges in the trajectory
         node_i = trajectory[i] #define node_i by node identification out of the trajectory list
         node_j = trajectory[i + 1] #define node_j by node identification out of the trajectory list
 
         wp_i = node_coordinates[node_i]  #get the coordinates of i out of the dictionary based on the ID
         wp_j = node_coordinates[node_j]  #get the coordinates of j out of the dictionary based on the ID
 
-        fuel_ij, time_ij, cost_ij = get_edge_cost( #store the return of the function in fuel_ij, time_ij and cost_ij
+        fuel_ij, time_ij, cost_ij = edge_cost_fn( #store the return of the function in fuel_ij, time_ij and cost_ij
             waypoint_i=wp_i,
             waypoint_j=wp_j,
             waypoint_i_id=node_i,
             current_weight_kg=weight,
             current_time=current_time, #link the variables needed for get_edge_cost to the right variables in this function
+            waypoint_j_id=node_j,
+            edge_geometry=edge_geometry,
         ) #This is the edge calculation with the get_edge_cost. It does this for every edge by using the for loop
 
 
@@ -56,6 +135,17 @@ def get_trajectory_cost(
 
         weight -= fuel_ij #for every iteration, substract the fuel burn from the weight so that the next iteration uses an updated weight
         current_time += time_ij #update the local time. The difference with total time is that total time is the duration of the flight and current time is the local time in hours from 1-13-2026 18.00 UTC. this is for the weather model.
+
+        weights.append(weight) #remember the state at every node
+        times.append(current_time)
+        fuels.append(total_fuel)
+        durations.append(total_time)
+        costs.append(total_cost)
+
+    if lower_bound is not None:
+        result = (lower_bound, total_fuel, total_time, weight) #the bound and the state where the evaluation stopped
+        return TrajectoryEvaluation(list(trajectory), t_start, weights, times, fuels, durations, costs, len(weights) - 1 - start, result, is_bound=True)
+
     if total_fuel > FUEL_BURN_MAX:
         total_cost += 1e12 #penalty for burning too much fuel.
 
@@ -64,7 +154,94 @@ def get_trajectory_cost(
     if total_time > TIME_MAX:
         total_cost += 1e12 #penalty for arriving too late
 
-    return (total_cost, total_fuel, total_time, weight) #return the total costs, total fuel, total flight time and the weight at the end of the cruise
+    result = (total_cost, total_fuel, total_time, weight) #the total costs, total fuel, total flight time and the weight at the end of the cruise
+    return TrajectoryEvaluation(list(trajectory), t_start, weights, times, fuels, durations, costs, len(trajectory) - 1 - start, result)
+
+
+def get_trajectory_cost(
+    trajectory, #this is a list of all the node (waypoint) IDs
+    node_coordinates, #this is a dictionary with all the node IDs as keys and coordinates (in a tuple) as value
+    t_start = 0.0, #the starting time in hours from 1-13-2026 18.00 UTC. this is used for different starting times in different scenarios for the algorithm. if no t_start is given, 0.0 is used
+    edge_geometry = None, #optional EdgeGeometryTable filled by build_adjacency_list. if given, distance, heading and ANSP costs are looked up instead of calculated
+    edge_cost_fn = get_edge_cost, #the function for one edge. can be replaced by an EdgeCostMemo (Trajectory/edge_cost_memo.py)
+): #define the function
+
+    return evaluate_trajectory(trajectory, node_coordinates, t_start, edge_geometry, edge_cost_fn).result #return the total costs, total fuel, total flight time and the weight at the end of the cruise
+
+"""
+The same calculation for a whole population at once. All trajectories of the bee colony have the same
+amount of nodes, so they can fly edge by edge in lockstep: every step is one call of get_edge_cost_batch
+for all trajectories, instead of one python loop per trajectory.
+"""
+
+def get_trajectory_cost_batch(
+    trajectories, #array (or list of lists) of node IDs with shape (population, nodes). every trajectory has the same length
+    t_start, #the starting time in hours from 1-13-2026 18.00 UTC. one value, or one per trajectory
+    edge_geometry, #the EdgeGeometryTable of the graph, filled by build_adjacency_list. needed for the batch lookups
+    wind_ids = None, #optional array that maps node IDs to waypoint IDs in the wind data (for other grids)
+): #define the function
+
+    trajectories = np.asarray(trajectories, dtype=np.int64)
+    if trajectories.ndim != 2:
+        raise ValueError("trajectories should be a 2D array: one row of node IDs per trajectory")
+    population = trajectories.shape[0]
+
+    weight = np.full(population, float(WEIGHT_START_CRUISE)) #The beginning weight of every trajectory
+    current_time = np.zeros(population) + np.asarray(t_start, dtype=float) #the current time at the start is the same as t_start
+    total_cost = np.zeros(population)
+    total_fuel = np.zeros(population)
+    total_time = np.zeros(population) #set all the end variables we want to know at zero.
+
+    rows = edge_geometry.edge_index(trajectories[:, :-1], trajectories[:, 1:]) #the geometry of every edge of every trajectory, looked up once
+    if wind_ids is not None:
+        wind_ids = np.asarray(wind_ids)[trajectories]
+
+    for i in range(trajectories.shape[1] - 1): #one step for edge i of all the trajectories
+        node_i = trajectories[:, i]
+        node_j = trajectories[:, i + 1]
+
+        fuel_ij, time_ij, cost_ij = get_edge_cost_batch(
+            node_i, node_j, weight, current_time, edge_geometry,
+            wind_ids = None if wind_ids is None else wind_ids[:, i],
+            rows = rows[:, i],
+        ) #all edges i in one go
+
+        total_fuel += fuel_ij
+        total_time += time_ij
+        total_cost += cost_ij
+
+        weight -= fuel_ij #the next edge uses the updated weights and times
+        current_time += time_ij
+
+    total_cost += np.where(total_fuel > FUEL_BURN_MAX, 1e12, 0.0) #penalty for burning too much fuel.
+    total_cost += np.where(total_time < TIME_MIN, 1e12, 0.0) #penalty for arriving too soon
+    total_cost += np.where(total_time > TIME_MAX, 1e12, 0.0) #penalty for arriving too late
+
+    return total_cost, total_fuel, total_time, weight #arrays with the total costs, total fuel, total flight time and the weight at the end of the cruise
+
+"""
+One fixed route (for example the great circle) for many departure times at once. Every start time is one
+row of the batch above, so the whole sweep flies the route only once, edge by edge.
+"""
+
+def get_trajectory_cost_for_start_times(
+    trajectory, #list of the node IDs of the route
+    node_coordinates, #dictionary with all the node IDs as keys and coordinates (in a tuple) as value
+    t_starts, #list or array of starting times in hours from 1-13-2026 18.00 UTC
+    edge_geometry = None, #optional EdgeGeometryTable of the graph, filled by build_adjacency_list
+    wind_ids = None, #optional array that maps node IDs to waypoint IDs in the wind data (for other grids)
+): #define the function
+
+    edges = list(zip(trajectory[:-1], trajectory[1:]))
+    if edge_geometry is None or not all(edge in edge_geometry for edge in edges):
+        edge_geometry = EdgeGeometryTable()
+        edge_geometry.fill(node_coordinates, edges) #the route is not (completely) in the graph, so only its own edges are calculated
+
+    t_starts = np.asarray(t_starts, dtype=float).ravel()
+    route = np.asarray(trajectory, dtype=np.int64)
+    trajectories = np.broadcast_to(route, (len(t_starts), len(route))) #the same route for every start time, without copying it
+
+    return get_trajectory_cost_batch(trajectories, t_starts, edge_geometry, wind_ids) #arrays with one value per start time
 
 """
 If you want to run this, I put a sample below. it is the great circle trajectory of AMS-NY. Just remove the quotes. 
@@ -0,0 +1,120 @@
+import sys
+import os
+import io
+import csv
+import time
+import contextlib
+from functools import partial
+
+"""
+Benchmark of the grid connectivity.
+
+For every grid density and lateral reach k this builds the graph and runs Dijkstra, and reports
+the edge count, the build time, the states Dijkstra visited and its runtime. Density d means d times
+as many rings (at 1/d of the ring spacing) and d times as many angle steps, so the grid covers the
+same area at a finer resolution. Use it to pick a resolution and reach that fit the latency budget.
+
+The wind data only exists for the waypoints of the standard grid, so finer grids use the wind of
+the nearest known waypoint (get_wind_ids).
+"""
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
+from src.grid import generate_grid, build_adjacency_list
+from src.edge_geometry import EdgeGeometryTable
+from src.solver_1 import solve_dynamic_dijkstra
+from Dijkstra.main_dijkstra import physics_adapter
+from weather.weather_model import get_wind_ids, get_wind_field
+
+
+SCHIPHOL = (52.308056, 4.764167)
+JFK = (40.641766, -73.780968)
+
+# Standard grid (density 1)
+N_RINGS = 29
+N_ANGLES = 21
+RING_SPACING_KM = 200.0
+MAX_WIDTH_KM = 1800.0
+BASE_WIDTH_M = 40000.0
+
+INITIAL_WEIGHT_KG = 257743.0
+START_TIME_SEC = 0.0
+TIME_BIN_SEC = 100.0
+TIME_RANGE_SEC = (7.0 * 3600.0, 7.5 * 3600.0)
+
+# Benchmark settings
+DENSITIES = [1, 2]
+LATERAL_REACHES = [1, 2, 3]
+MAX_TRACK_CHANGE_DEG = None # e.g. 30.0 to also limit how sharp a turn may be
+OUTPUT_CSV = os.path.join(current_dir, "connectivity_benchmark.csv")
+
+
+def run_case(density, lateral_reach):
+    n_rings = N_RINGS * density
+    n_angles = (N_ANGLES - 1) * density + 1 # keep the outer angles at the same place
+    ring_spacing_km = RING_SPACING_KM / density
+
+    # 1. Build the grid and graph
+    t0 = time.perf_counter()
+    nodes, node_coords = generate_grid(SCHIPHOL, JFK, n_rings, n_angles, ring_spacing_km, MAX_WIDTH_KM, BASE_WIDTH_M)
+    edge_geometry = EdgeGeometryTable()
+    graph = build_adjacency_list(
+        node_coords, n_rings, n_angles, lambda a, b: 0.0,
+        edge_geometry=edge_geometry,
+        lateral_reach=lateral_reach,
+        max_track_change_deg=MAX_TRACK_CHANGE_DEG
+    )
+    wind_ids = get_wind_ids(node_coords)
+    build_time = time.perf_counter() - t0
+
+    # 2. Run Dijkstra (its progress prints are hidden)
+    t0 = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        path, cost, states = solve_dynamic_dijkstra(
+            adjacency_list=graph,
+            node_coords=node_coords,
+            start_node_id=0,
+            end_node_id=len(nodes) - 1,
+            initial_weight_kg=INITIAL_WEIGHT_KG,
+            start_time_sec=START_TIME_SEC,
+            physics_engine_fn=partial(physics_adapter, edge_geometry=edge_geometry, wind_ids=wind_ids),
+            time_bin_sec=TIME_BIN_SEC,
+            target_time_range_sec=TIME_RANGE_SEC
+        )
+    search_time = time.perf_counter() - t0
+
+    return {
+        "density": density,
+        "lateral_reach": lateral_reach,
+        "nodes": len(nodes),
+        "edges": len(edge_geometry),
+        "build_s": round(build_time, 3),
+        "states": states,
+        "dijkstra_s": round(search_time, 3),
+        "cost_eur": round(cost, 2) if path else None,
+    }
+
+
+def main():
+    get_wind_field() # load the wind before timing anything
+
+    rows = []
+    print(f"{'density':>7} {'k':>3} {'nodes':>7} {'edges':>8} {'build s':>8} {'states':>9} {'dijkstra s':>10} {'cost €':>11}")
+    for density in DENSITIES:
+        for lateral_reach in LATERAL_REACHES:
+            row = run_case(density, lateral_reach)
+            rows.append(row)
+            print(f"{row['density']:>7} {row['lateral_reach']:>3} {row['nodes']:>7} {row['edges']:>8} "
+                  f"{row['build_s']:>8.3f} {row['states']:>9} {row['dijkstra_s']:>10.3f} {str(row['cost_eur']):>11}")
+
+    with open(OUTPUT_CSV, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0].keys()))
+        writer.writeheader()
+        writer.writerows(rows)
+    print(f"Results saved to {OUTPUT_CSV}")
+
+
+if __name__ == "__main__":
+    main()
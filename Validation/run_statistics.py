@@ -39,7 +39,7 @@ MAX_FLIGHT_DURATION_HOURS = 7.50
 
 
 #   Physics Adapter
-def physics_adapter(u_id, waypoint_i, waypoint_j, current_weight_kg, current_time):
+def physics_adapter(u_id, waypoint_i, waypoint_j, current_weight_kg, current_time, v_id=None):
     return get_edge_cost(waypoint_i, waypoint_j, u_id, current_weight_kg, current_time)
 
 
@@ -1,5 +1,6 @@
 import sys
 import os
+from functools import partial
 
 
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -7,6 +8,7 @@ parent_dir = os.path.dirname(current_dir)
 sys.path.append(parent_dir)
 
 from src.grid import generate_grid, build_adjacency_list
+from src.edge_geometry import EdgeGeometryTable
 from src.solver_1 import solve_dynamic_dijkstra
 from Trajectory.edge_cost_aircraft1 import get_edge_cost
 
@@ -22,13 +24,15 @@ BASE_WIDTH_M = 40000.0
 INITIAL_WEIGHT_KG = 257743.0
 START_TIME_SEC = 0.0
 
-def physics_adapter(u_id, waypoint_i, waypoint_j, current_weight_kg, current_time):
+def physics_adapter(u_id, waypoint_i, waypoint_j, current_weight_kg, current_time, v_id=None, edge_geometry=None):
     return get_edge_cost(
         waypoint_i=waypoint_i,
         waypoint_j=waypoint_j,
         waypoint_i_id=u_id,
         current_weight_kg=current_weight_kg,
-        current_time=current_time
+        current_time=current_time,
+        waypoint_j_id=v_id,
+        edge_geometry=edge_geometry
     )
 
 # Main
@@ -38,7 +42,8 @@ def main():
 
     # 1. Generate Mini Grid
     nodes, node_coords = generate_grid(SCHIPHOL, JFK, N_RINGS, N_ANGLES, RING_SPACING_KM, MAX_WIDTH_KM, BASE_WIDTH_M)
-    graph = build_adjacency_list(node_coords, N_RINGS, N_ANGLES, lambda a, b: 0.0)
+    edge_geometry = EdgeGeometryTable()
+    graph = build_adjacency_list(node_coords, N_RINGS, N_ANGLES, lambda a, b: 0.0, edge_geometry=edge_geometry)
     end_node_id = len(nodes) - 1
 
     print(f"Graph Built: {len(nodes)} nodes total.")
@@ -52,7 +57,7 @@ def main():
         end_node_id=end_node_id,
         initial_weight_kg=INITIAL_WEIGHT_KG,
         start_time_sec=START_TIME_SEC,
-        physics_engine_fn=physics_adapter,
+        physics_engine_fn=partial(physics_adapter, edge_geometry=edge_geometry),
         time_bin_sec=100.0,
         target_time_range_sec=None
     )
@@ -1,3 +1,5 @@
+import bisect
+import numpy as np
 import pandas as pd
 from pathlib import Path
 
@@ -11,80 +13,113 @@ weight_table = df["Gross_Weight"].tolist() # make a table for interpolation and
 ff_table = df["fuel_flow"].tolist() #make a table for interpolation and extrapolation
 
 
-def get_fuel_flow(weight, weight_table, ff_table): #make a function which calculates fuel flow by the interpolation by weights
+class FuelFlowModel:
+    """
+    Fuel flow (kg/h) as a function of gross weight (kg), by linear interpolation in a performance table.
 
-    pairs = sorted(zip(weight_table, ff_table)) #make every index of weight and fuel flow table pairs (stores them in tuples). Then it sorts the values so that the weights are ascending
-    weight_table = [p[0] for p in pairs] #now that it is ensured that the weights are ascending, we are going to reconstruct the weight table
-    ff_table = [p[1] for p in pairs]  #now that it is ensured that the weights are ascending, we are going to reconstruct the FF table
+    The table is sorted once when the model is made, the weight interval is then found with a binary search.
+    Outside the table, the first two or the last two points are used to extrapolate.
+    A model can be called with one weight or with an array of weights.
+    """
 
-    if weight in weight_table:
-        return ff_table[weight_table.index(weight)] #for the magic coincidence that the exact weight is listed in the data
+    def __init__(self, weight_table, ff_table):
+        pairs = sorted(zip(weight_table, ff_table)) #make every index of weight and fuel flow table pairs. sort them so that the weights are ascending
+        if len(pairs) < 2:
+            raise ValueError("a fuel flow table needs at least 2 weights to interpolate")
+
+        self.weights = [p[0] for p in pairs] #python lists for the fast path with one weight
+        self.fuel_flows = [p[1] for p in pairs]
+        self._exact = {} #for the magic coincidence that the exact weight is listed in the data
+        for w, ff in pairs:
+            self._exact.setdefault(w, ff)
+
+        self._weights_array = np.asarray(self.weights, dtype=float) #numpy arrays for the batch path
+        self._ff_array = np.asarray(self.fuel_flows, dtype=float)
+
+    @classmethod
+    def from_csv(cls, path, weight_column="Gross_Weight", ff_column="fuel_flow"):
+        table = pd.read_csv(path)
+        return cls(table[weight_column].tolist(), table[ff_column].tolist())
+
+    def fuel_flow(self, weight):
+        """
+        Fuel flow for one weight.
+        """
+        exact = self._exact.get(weight)
+        if exact is not None:
+            return exact
+
+        W = self.weights
+        if weight < W[0]:
+            i = 0 #extrapolation with the first two points
+        elif weight > W[-1]:
+            i = len(W) - 2 #extrapolation with the last two points
+        else:
+            i = bisect.bisect_left(W, weight) - 1 #the interval W[i] < weight < W[i + 1]
+
+        Wa, Wb = W[i], W[i + 1]
+        FFa, FFb = self.fuel_flows[i], self.fuel_flows[i + 1]
+        return ((weight - Wb) / (Wa - Wb)) * FFa + ((weight - Wa) / (Wb - Wa)) * FFb #this is the linear interpolation formula
+
+    def min_fuel_flow(self, weight_min, weight_max):
+        """
+        The lowest fuel flow for any weight between weight_min and weight_max.
+        The model is linear between the table weights, so the lowest value is at one of the ends or at a table weight in between.
+        """
+        candidates = [self.fuel_flow(weight_min), self.fuel_flow(weight_max)]
+        candidates += [ff for w, ff in zip(self.weights, self.fuel_flows) if weight_min < w < weight_max]
+        return min(candidates)
+
+    def __call__(self, weight):
+        """
+        Fuel flow for one weight, or an array of fuel flows for an array of weights.
+        """
+        if isinstance(weight, (int, float)) or np.ndim(weight) == 0: #isinstance first, it is the quick check for the common case
+            return self.fuel_flow(float(weight)) #float() also for a 0-d numpy array, which can't be a dictionary key
+
+        w = np.asarray(weight, dtype=float)
+        W = self._weights_array
+        FF = self._ff_array
+        i = np.clip(np.searchsorted(W, w, side='right') - 1, 0, len(W) - 2) #the interval of every weight. outside the table, the first or last interval
+        Wa, Wb = W[i], W[i + 1]
+        FFa, FFb = FF[i], FF[i + 1]
+        return ((w - Wb) / (Wa - Wb)) * FFa + ((w - Wa) / (Wb - Wa)) * FFb
+
+
+fuel_flow_ac1 = FuelFlowModel(weight_table, ff_table) #the model of aircraft 1, made once
+
+
+def _table_model(last, weight_table, ff_table):
     """
-    now the inter/extrapolation begins wth first defining the variables
+    The FuelFlowModel of the tables, reused when the same table lists (the same objects) are passed again.
+    last is [weight_table, ff_table, model] of the previous call. the tables are compared with 'is', that is O(1)
+    and keeps one model, so a table that is changed in place needs to be a new list.
     """
-
-    Wmin = weight_table[0]
-    Wmax = weight_table[-1] #boundaries of the table
-
-    if weight < Wmin:
-        Wa, Wb = weight_table[0], weight_table[1]
-        FFa, FFb = ff_table[0], ff_table[1] #this is for extrapolation if the weight falls outside the datapoints
-
-    elif weight > Wmax:
-        Wa, Wb = weight_table[-2], weight_table[-1]
-        FFa, FFb = ff_table[-2], ff_table[-1] #this is for extrapolation if the weight falls outside the datapoints
-
-    else:
-        for i in range(len(weight_table) - 1): #start of the loop to create weight intervals
-            Wa = weight_table[i]
-            Wb = weight_table[i + 1]
-            if Wa <= weight <= Wb: #is the weight in interval i?
-                FFa = ff_table[i] #if yes, give the FFa which corresponds to Wa
-                FFb = ff_table[i + 1] #if yes, give the FFv which corresponds to Wb
-                break #if yes, stop the loop. if weight is not in interval, go to the next index
-    FF = ((weight - Wb) / (Wa - Wb)) * FFa + ((weight - Wa) / (Wb - Wa)) * FFb #this is the linear interpolation formula
-
-    return FF
+    if weight_table is not last[0] or ff_table is not last[1]:
+        last[:] = [weight_table, ff_table, FuelFlowModel(weight_table, ff_table)]
+    return last[2]
 
 
+_last_table = [None, None, None] #the tables of the last get_fuel_flow call and their model
 
 
+def get_fuel_flow(weight, weight_table, ff_table): #make a function which calculates fuel flow by the interpolation by weights
+    """
+    Fuel flow for one weight from any weight and fuel flow table.
+    the model is only made again when other tables are passed. if you use the same table more often,
+    keep a FuelFlowModel (aircraft 1 has fuel_flow_ac1).
+    """
+    return _table_model(_last_table, weight_table, ff_table)(weight)
 
 
 """
-The code below does exactly the same for aircraft 2 so i'm not going to comment that again
+Aircraft 2 works exactly the same, it just has its own table. So it is the same model, not a copy of the code.
+There is no table of aircraft 2 in the repo, so it is passed as arguments, like before. It keeps its own model,
+so alternating calls for aircraft 1 and 2 don't make new models.
 """
 
+_last_table_ac2 = [None, None, None]
 
-def get_fuel_flow_ac2(weight, weight_table2, ff_table2):
-
-    pairs = sorted(zip(weight_table2, ff_table2))
-    weight_table2 = [p[0] for p in pairs]
-    ff_table2 = [p[1] for p in pairs]
-
-    if weight in weight_table2:
-        return ff_table2[weight_table2.index(weight)]
-
-    Wmin = weight_table2[0]
-    Wmax = weight_table2[-1]
-
-    if weight < Wmin:
-        Wa, Wb = weight_table2[0], weight_table2[1]
-        FFa, FFb = ff_table2[0], ff_table2[1]
-
-    elif weight > Wmax:
-        Wa, Wb = weight_table2[-2], weight_table2[-1]
-        FFa, FFb = ff_table2[-2], ff_table2[-1]
-
-    else:
-        for i in range(len(weight_table2) - 1):
-            Wa = weight_table2[i]
-            Wb = weight_table2[i + 1]
-            if Wa <= weight <= Wb:
-                FFa = ff_table2[i]
-                FFb = ff_table2[i + 1]
-                break
-    FF = ((weight - Wb) / (Wa - Wb)) * FFa + ((weight - Wa) / (Wb - Wa)) * FFb
-
-    return FF
 
+def get_fuel_flow_ac2(weight, weight_table2, ff_table2):
+    return _table_model(_last_table_ac2, weight_table2, ff_table2)(weight)
@@ -6,6 +6,8 @@ project_root = os.path.dirname(current_dir)
 sys.path.append(project_root)
 
 from src.grid import generate_grid, build_adjacency_list
+from src.graph_cache import cached_grid_graph
+from src.grid_graph import AdjacencyView
 
 """
 Graph generation (Bee Colony)
@@ -20,6 +22,15 @@ time- and weight-dependent effects (wind, fuel burn, etc.).
 
 Therefore, we provide a dummy edge_cost_fn that returns 0.0 so the adjacency list can be
 built without affecting the Bee Colony optimisation.
+
+The static geometry of the edges (distance, heading, ANSP cost) is useful though: pass an
+EdgeGeometryTable to build_graph and it is filled once, so get_trajectory_cost can look it up.
+
+With use_cache=True (the default) the grid, adjacency and edge geometry are read from one file in
+graph_cache/, so the hundreds of batch processes don't all build the same graph again. The file name
+is a hash of the grid parameters, so a change in the parameters gives a new cache file.
+The graph is then an AdjacencyView of the cached arrays: it still works like the dict of build_adjacency_list,
+but the bee colony helpers take the neighbors straight from its arrays (successors), in the same order.
 """
 
 def calculate_edge_cost(a, b):
@@ -27,7 +38,7 @@ def calculate_edge_cost(a, b):
     return 0.0
 
 
-def build_graph(): #this function which builds the graph with all the nodes (identifications and coordinates)
+def build_graph(edge_geometry=None, use_cache=True): #this function which builds the graph with all the nodes (identifications and coordinates). edge_geometry is an optional EdgeGeometryTable that gets filled
     SCHIPHOL = (52.308056, 4.764167) #schiphol coordinate
     JFK = (40.641766, -73.780968) #JFK coordinate
 
@@ -37,6 +48,16 @@ def build_graph(): #this function which builds the graph with all the nodes (ide
     MAX_WIDTH_KM = 1800.0 #max width with respect to the great circle route in kilometers
     BASE_WITDH_M = 40000.0 #base width in meters
 
+    if use_cache:
+        grid_graph = cached_grid_graph(
+            SCHIPHOL, JFK, N_RINGS, N_ANGLES, RING_SPACING_KM, MAX_WIDTH_KM, BASE_WITDH_M,
+            edge_geometry=edge_geometry
+        ) #load the graph from the cache. the first time it is generated and stored
+        node_coords = grid_graph.to_node_coords()
+        nodes = list(node_coords.values())
+        graph = AdjacencyView(grid_graph) #reads like the dict of build_adjacency_list (dummy costs of 0.0), and has successors for get_neighbors
+        return nodes, node_coords, graph, N_RINGS, N_ANGLES
+
     nodes, node_coords = generate_grid(
         origin=SCHIPHOL,
         destination=JFK,
@@ -52,6 +73,7 @@ def build_graph(): #this function which builds the graph with all the nodes (ide
         n_rings=N_RINGS,
         n_angles=N_ANGLES,
         edge_cost_fn=calculate_edge_cost,
+        edge_geometry=edge_geometry,
     ) #build the adjacency list. With our dummy for the costs. each nodes gets a list of adjecent nodes. later used for trajectory generation
 
     return nodes, node_coords, graph, N_RINGS, N_ANGLES
@@ -1,35 +1,47 @@
 """"
 This file calculates the fuel burn, time and costs of the great circle route for each scenario. this is for comparison with the algorithms
+The route never changes, so all start times are calculated together (get_trajectory_cost_for_start_times).
+That is fast enough to also make a curve of the costs against the departure time with a 5 minute step.
 """
-from Trajectory.trajectory_cost_ac1 import get_trajectory_cost
+from Trajectory.trajectory_cost_ac1 import get_trajectory_cost_for_start_times
 from graph_build_for_bee.build_graph_function import build_graph
+from src.edge_geometry import EdgeGeometryTable
+import numpy as np
 import pandas as pd
 
-nodes, node_coords, graph, N_RINGS, N_ANGLES = build_graph()
+edge_geometry = EdgeGeometryTable() #distance, heading and ANSP costs of every edge, computed once
+nodes, node_coords, graph, N_RINGS, N_ANGLES = build_graph(edge_geometry=edge_geometry)
 
 great_circle_trajectory = [0, 11, 32, 53, 74, 95, 116, 137, 158, 179, 200, 221, 242, 263, 284, 305, 326, 347, 368, 389, 410, 431, 452, 473, 494, 515, 536, 557, 578, 610] #all the node IDs
 
 
 t_starts = [float(i) for i in range(31)] #there are 31 t_starts. Every start is exactly 1.0 hours later
 
-results = [] #make a list in which dictionaries are put for every t start
-for t_start in t_starts: #start the loop
-    total_cost, total_fuel, total_time, _ = get_trajectory_cost(
-        great_circle_trajectory,
-        node_coords,
-        t_start=t_start
-    ) #calculate the costs, fuel, and time for the great circle trajectory for a given t_start
-
-    results.append({
-        "t_start_h": t_start,
-        "total_cost": total_cost,
-        "total_fuel_kg": total_fuel,
-        "total_time_h": total_time,
-    }) #store the outcomes in a dictionary and add it to results
-
-df = pd.DataFrame(results).sort_values("t_start_h").reset_index(drop=True) #make a dataframe from the list. make the times ascending (if this was not already the case). probably unnecessary
+total_cost, total_fuel, total_time, _ = get_trajectory_cost_for_start_times(
+    great_circle_trajectory,
+    node_coords,
+    t_starts,
+    edge_geometry
+) #calculate the costs, fuel, and time for the great circle trajectory for every t_start at once
+
+df = pd.DataFrame({
+    "t_start_h": t_starts,
+    "total_cost": total_cost,
+    "total_fuel_kg": total_fuel,
+    "total_time_h": total_time,
+}) #one row per t_start
+df = df.sort_values("t_start_h").reset_index(drop=True) #make the times ascending (if this was not already the case). probably unnecessary
 df.to_csv("great_circle.csv", index=False) #export it to a csv
 
 
+CURVE_STEP_H = 5.0 / 60.0 #5 minutes between the departure times of the curve
+curve_t_starts = np.arange(0.0, 30.0 + CURVE_STEP_H / 2, CURVE_STEP_H) #from t = 0 to t = 30 hours
 
+curve_cost, curve_fuel, curve_time, _ = get_trajectory_cost_for_start_times(great_circle_trajectory, node_coords, curve_t_starts, edge_geometry)
 
+pd.DataFrame({
+    "t_start_h": curve_t_starts,
+    "total_cost": curve_cost,
+    "total_fuel_kg": curve_fuel,
+    "total_time_h": curve_time,
+}).to_csv("great_circle_departure_curve.csv", index=False) #the cost against the departure time
@@ -40,10 +40,9 @@ def _get_rate_eur_per_km(region: str) -> float:
     return 0.7       # €/km
 
 
-def get_ansp_cost_for_edge(a: Coord, b: Coord) -> float:
+def get_ansp_region_for_edge(a: Coord, b: Coord) -> str:
     """
-    Approximate ANSP cost for one edge by assigning the whole edge
-    to the region containing its midpoint and multiplying by distance.
+    The ANSP region that is charged for an edge: the region of its midpoint.
     """
     lat_a, lon_a = a
     lat_b, lon_b = b
@@ -52,7 +51,15 @@ def get_ansp_cost_for_edge(a: Coord, b: Coord) -> float:
     lat_mid = 0.5 * (lat_a + lat_b)
     lon_mid = 0.5 * (lon_a + lon_b)
 
-    region = _get_region(lat_mid, lon_mid)
+    return _get_region(lat_mid, lon_mid)
+
+
+def get_ansp_cost_for_edge(a: Coord, b: Coord) -> float:
+    """
+    Approximate ANSP cost for one edge by assigning the whole edge
+    to the region containing its midpoint and multiplying by distance.
+    """
+    region = get_ansp_region_for_edge(a, b)
     rate = _get_rate_eur_per_km(region)
 
     dist_m, _ = v_direct(a, b)
@@ -0,0 +1,46 @@
+import math
+from typing import Optional
+
+import numpy as np
+
+
+def cost_to_go(
+        sources: np.ndarray,
+        targets: np.ndarray,
+        edge_costs: np.ndarray,
+        end_node_id: int,
+        n_nodes: Optional[int] = None,
+) -> np.ndarray:
+    """
+    Lowest cost from every node to the end node, over the given edge costs.
+
+    The grid is a DAG in node order: every edge goes to the next ring or to
+    the destination, so to a higher node ID. One pass over the edges from
+    the highest source down to the lowest is then enough (a reverse
+    topological pass). Nothing is solved twice.
+
+    With lower bounds as edge costs (EdgeCostBound.edge_costs), the result
+    is an admissible heuristic for A* (solve_dynamic_dijkstra(heuristic=...)).
+    Nodes that can't reach the end get inf.
+    """
+    sources = np.asarray(sources, dtype=np.int64)
+    targets = np.asarray(targets, dtype=np.int64)
+    edge_costs = np.asarray(edge_costs, dtype=float)
+    if n_nodes is None:
+        n_nodes = int(max(sources.max(initial=-1), targets.max(initial=-1), end_node_id)) + 1
+
+    if np.any(targets <= sources):
+        raise ValueError("cost_to_go needs edges that go from a lower to a higher node ID (a ring DAG)")
+
+    h = [math.inf] * n_nodes
+    h[end_node_id] = 0.0
+
+    # Highest source first, so h[target] is final before it is used
+    order = np.argsort(-sources, kind="stable")
+    for u, v, c in zip(sources[order].tolist(), targets[order].tolist(), edge_costs[order].tolist()):
+        candidate = c + h[v]
+        if candidate < h[u]:
+            h[u] = candidate
+
+    return np.asarray(h, dtype=float)
+
@@ -0,0 +1,143 @@
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from .ansp import get_ansp_region_for_edge, _get_rate_eur_per_km
+from .vinc import v_direct_batch
+
+# For readability purposes
+Coord = Tuple[float, float]  # (lat, lon)
+NodeCoords = Dict[int, Coord]
+Edge = Tuple[int, int]  # (u, v)
+
+
+class EdgeGeometry(NamedTuple):
+    """
+    Everything about an edge that does not depend on time or weight.
+    """
+    distance_km: float
+    heading_deg: float  # initial heading (azimuth at u)
+    region: str  # ANSP region of the midpoint
+    ansp_eur: float  # ANSP charge for the whole edge
+
+
+class EdgeGeometryTable:
+    """
+    Static per-edge geometry, keyed by (u, v).
+
+    The grid never moves during a search, so distance, heading and ANSP cost
+    of an edge are computed once (in build_adjacency_list) with the batch
+    Vincenty solver. The physics engine then only reads from this table
+    instead of solving the geodesic again on every state expansion.
+
+    The values are also kept as arrays (in edge order) for batch evaluation.
+    """
+
+    def __init__(self):
+        self._index: Dict[Edge, int] = {}
+        self._records: List[EdgeGeometry] = []
+        self.sources = np.empty(0, dtype=np.int64)
+        self.targets = np.empty(0, dtype=np.int64)
+        self.distance_km = np.empty(0)
+        self.heading_deg = np.empty(0)
+        self.ansp_eur = np.empty(0)
+        self.regions: List[str] = []
+        # Sorted (u * n_nodes + v) keys for vectorized lookups
+        self._n_nodes = 0
+        self._sorted_keys = np.empty(0, dtype=np.int64)
+        self._sorted_order = np.empty(0, dtype=np.int64)
+
+    def fill(self, node_coords: NodeCoords, edges: Iterable[Edge]) -> None:
+        """
+        Compute the geometry of all edges in one batch and (re)fill the table.
+        """
+        edges = list(edges)
+        sources = np.array([u for u, _ in edges], dtype=np.int64)
+        targets = np.array([v for _, v in edges], dtype=np.int64)
+
+        lat_a = np.array([node_coords[u][0] for u, _ in edges], dtype=float)
+        lon_a = np.array([node_coords[u][1] for u, _ in edges], dtype=float)
+        lat_b = np.array([node_coords[v][0] for _, v in edges], dtype=float)
+        lon_b = np.array([node_coords[v][1] for _, v in edges], dtype=float)
+
+        # One batched geodesic solve for every edge
+        dist_m, heading_deg, _ = v_direct_batch(lat_a, lon_a, lat_b, lon_b)
+        distance_km = dist_m / 1000.0
+
+        # ANSP: whole edge charged at the rate of its midpoint region
+        regions = [get_ansp_region_for_edge(node_coords[u], node_coords[v]) for u, v in edges]
+        rates = np.array([_get_rate_eur_per_km(region) for region in regions], dtype=float)
+
+        self.set_arrays(sources, targets, distance_km, heading_deg, regions, rates * distance_km)
+
+    def set_arrays(
+            self,
+            sources: np.ndarray,
+            targets: np.ndarray,
+            distance_km: np.ndarray,
+            heading_deg: np.ndarray,
+            regions: List[str],
+            ansp_eur: np.ndarray,
+    ) -> None:
+        """
+        (Re)fill the table with precomputed geometry, for example from the graph cache.
+        """
+        sources = np.asarray(sources, dtype=np.int64)
+        targets = np.asarray(targets, dtype=np.int64)
+        distance_km = np.asarray(distance_km, dtype=float)
+        heading_deg = np.asarray(heading_deg, dtype=float)
+        regions = [str(region) for region in regions]
+
+        self.sources = sources
+        self.targets = targets
+        self.distance_km = distance_km
+        self.heading_deg = heading_deg
+        self.ansp_eur = np.asarray(ansp_eur, dtype=float)
+        self.regions = regions
+        self._index = {edge: i for i, edge in enumerate(zip(sources.tolist(), targets.tolist()))}
+
+        self._n_nodes = int(max(sources.max(initial=-1), targets.max(initial=-1))) + 1
+        keys = sources * self._n_nodes + targets
+        self._sorted_order = np.argsort(keys, kind="stable")
+        self._sorted_keys = keys[self._sorted_order]
+        # Plain python records for the scalar lookups in the hot loop
+        self._records = [
+            EdgeGeometry(d, h, region, eur)
+            for d, h, region, eur in zip(
+                distance_km.tolist(), heading_deg.tolist(), regions, self.ansp_eur.tolist()
+            )
+        ]
+
+    def edge_index(self, sources, targets) -> np.ndarray:
+        """
+        Vectorized lookup: the row of every (sources[i], targets[i]) edge
+        in the distance_km / heading_deg / ansp_eur arrays.
+        """
+        sources, targets = np.broadcast_arrays(
+            np.asarray(sources, dtype=np.int64), np.asarray(targets, dtype=np.int64)
+        )
+        keys = sources * self._n_nodes + targets
+
+        n_edges = len(self._sorted_keys)
+        pos = np.minimum(np.searchsorted(self._sorted_keys, keys), max(n_edges - 1, 0))
+        found = (sources >= 0) & (sources < self._n_nodes) & (targets >= 0) & (targets < self._n_nodes)
+        if n_edges > 0:
+            found &= self._sorted_keys[pos] == keys
+        if not np.all(found):
+            bad = tuple(np.argwhere(~found)[0])
+            raise KeyError((int(sources[bad]), int(targets[bad])))
+        return self._sorted_order[pos]
+
+    def __getitem__(self, edge: Edge) -> EdgeGeometry:
+        return self._records[self._index[edge]]
+
+    def get(self, edge: Edge, default: Optional[EdgeGeometry] = None) -> Optional[EdgeGeometry]:
+        if edge not in self._index:
+            return default
+        return self[edge]
+
+    def __contains__(self, edge: Edge) -> bool:
+        return edge in self._index
+
+    def __len__(self) -> int:
+        return len(self._index)
@@ -0,0 +1,163 @@
+import hashlib
+import io
+import os
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional, Tuple
+
+import numpy as np
+
+from .edge_geometry import EdgeGeometryTable
+from .grid import generate_grid, build_grid_graph
+from .grid_graph import GridGraph
+
+# For readability purposes
+Coord = Tuple[float, float]  # (lat, lon)
+
+# Default location of the cache files (one .npz per set of grid parameters)
+CACHE_DIR = Path(__file__).resolve().parents[1] / "graph_cache"
+
+# Change this if the layout of the cache file changes, so old files are rebuilt
+CACHE_FORMAT = 1
+
+# The code that makes the cached data: the grid itself, the edge geometry
+# (distance and heading from vinc) and the ANSP regions and rates. A change
+# in one of these files gives another key, so an old cache is never used.
+CODE_FILES = ("grid.py", "grid_graph.py", "edge_geometry.py", "vinc.py", "ansp.py")
+
+
+@lru_cache(maxsize=None)
+def code_fingerprint() -> str:
+    """
+    Hash of the source of CODE_FILES, read once per process.
+    """
+    h = hashlib.sha256()
+    src_dir = Path(__file__).resolve().parent
+    for name in CODE_FILES:
+        h.update(name.encode())
+        h.update((src_dir / name).read_bytes())
+    return h.hexdigest()
+
+
+def grid_cache_key(
+        origin: Coord,
+        destination: Coord,
+        n_rings: int,
+        n_angles: int,
+        ring_spacing_km: float,
+        max_width_km: float,
+        base_width_m: float,
+        include_code: bool = True,
+) -> str:
+    """
+    Hash of everything that determines the grid and its edge geometry:
+    the parameters and the code that uses them (code_fingerprint).
+    With include_code=False only the parameters, used for the file name.
+    repr() keeps every digit of the floats.
+    """
+    params = (
+        CACHE_FORMAT, code_fingerprint() if include_code else None,
+        tuple(map(float, origin)), tuple(map(float, destination)),
+        int(n_rings), int(n_angles),
+        float(ring_spacing_km), float(max_width_km), float(base_width_m),
+    )
+    return hashlib.sha256(repr(params).encode()).hexdigest()
+
+
+def save_grid_cache(path, graph: GridGraph, edge_geometry: EdgeGeometryTable, key: str) -> None:
+    """
+    Write node table, CSR adjacency and edge geometry to one .npz file.
+
+    The file is written under a temporary name and then renamed, so processes
+    that start at the same time never read a half written cache.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.stem}.{os.getpid()}.tmp")
+
+    with open(tmp_path, "wb") as f:
+        np.savez(
+            f,
+            key=np.array(key),
+            n_angles=np.array(graph.n_angles),
+            lat=graph.lat,
+            lon=graph.lon,
+            offsets=graph.offsets,
+            indices=graph.indices,
+            costs=graph.costs,
+            ring=graph.ring,
+            angle=graph.angle,
+            edge_sources=edge_geometry.sources,
+            edge_targets=edge_geometry.targets,
+            distance_km=edge_geometry.distance_km,
+            heading_deg=edge_geometry.heading_deg,
+            ansp_eur=edge_geometry.ansp_eur,
+            regions=np.array(edge_geometry.regions, dtype=str),
+        )
+    os.replace(tmp_path, path)
+
+
+def load_grid_cache(path, key: Optional[str] = None,
+                    edge_geometry: Optional[EdgeGeometryTable] = None) -> Optional[GridGraph]:
+    """
+    Load a cache file with a single read. Returns None if the file is missing,
+    damaged or was made for other grid parameters.
+    """
+    try:
+        data = np.load(io.BytesIO(Path(path).read_bytes()))
+        if key is not None and str(data["key"]) != key:
+            return None
+        graph = GridGraph(
+            data["offsets"], data["indices"], data["costs"],
+            data["lat"], data["lon"], data["ring"], data["angle"],
+            int(data["n_angles"]),
+        )
+        if edge_geometry is not None:
+            edge_geometry.set_arrays(
+                data["edge_sources"], data["edge_targets"], data["distance_km"],
+                data["heading_deg"], data["regions"].tolist(), data["ansp_eur"],
+            )
+    except (OSError, ValueError, KeyError):
+        return None
+    return graph
+
+
+def cached_grid_graph(
+        origin: Coord,
+        destination: Coord,
+        n_rings: int,
+        n_angles: int,
+        ring_spacing_km: float,
+        max_width_km: float,
+        base_width_m: float,
+        edge_geometry: Optional[EdgeGeometryTable] = None,
+        cache_dir=CACHE_DIR,
+) -> GridGraph:
+    """
+    The grid graph (all static edge costs 0.0) for these parameters, from the
+    cache if it exists, otherwise generated and written to the cache.
+    If an EdgeGeometryTable is passed, it is filled as well.
+
+    There is one file per set of parameters. The stored key also covers the
+    code, so after a code change the file does not match and is overwritten.
+    """
+    params = (origin, destination, n_rings, n_angles, ring_spacing_km, max_width_km, base_width_m)
+    key = grid_cache_key(*params)
+    path = Path(cache_dir) / f"grid_{grid_cache_key(*params, include_code=False)[:16]}.npz"
+
+    graph = load_grid_cache(path, key, edge_geometry)
+    if graph is not None:
+        return graph
+
+    _, node_coords = generate_grid(
+        origin, destination, n_rings, n_angles, ring_spacing_km, max_width_km, base_width_m
+    )
+    geometry = edge_geometry if edge_geometry is not None else EdgeGeometryTable()
+    graph = build_grid_graph(node_coords, n_rings, n_angles, edge_geometry=geometry)
+
+    try:
+        save_grid_cache(path, graph, geometry, key)
+    except OSError:
+        pass  # read only folder: just use the graph without caching it
+
+    return graph
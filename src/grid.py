@@ -1,7 +1,9 @@
-import math
-from typing import Dict, List, Tuple, Callable
+from typing import Dict, List, Optional, Tuple, Callable
 from collections import defaultdict
-from .vinc import v_direct, v_inverse
+import numpy as np
+from .vinc import v_direct, v_inverse_batch, v_direct_batch
+from .edge_geometry import EdgeGeometryTable
+from .grid_graph import GridGraph
 
 # These are just type aliases to make the code more readable
 NodeCoords = Dict[int, Tuple[float, float]]
@@ -10,17 +12,18 @@ EdgeCostFunc = Callable[[Tuple[float, float], Tuple[float, float]], float]
 
 
 def _calculate_width_at_ring(
-        ring_idx: int,
+        ring_idx,
         total_rings: int,
         max_width_km: float,
         base_width_m: float
-) -> float:
+):
     """
     Internal helper: Calculates the grid width at a specific ring index using a sine wave.
+    ring_idx can also be an array of ring indices, then an array of widths is returned.
     """
     # To make it more robust, here is a check to avoid division by zero. And just use the predifind base width.
     if total_rings <= 1:
-        return base_width_m
+        return base_width_m + 0.0 * np.asarray(ring_idx, dtype=float)
 
     # Calculate how far through the rings we are (0.0 at start, 1.0 at end)
     progress = ring_idx / (total_rings - 1)
@@ -37,13 +40,78 @@ def _calculate_width_at_ring(
     At progress=0.5: sin(π/2) = 1 (widest in middle)
     At progress=1.0: sin(π) = 0 (narrow at end)
     """
-    sine_factor = math.sin(math.pi * progress)
+    sine_factor = np.sin(np.pi * progress)
 
     # Final Width = Base + (Bulge * Sine)
     # This is to make sure the grid bulges in the middle and tapers at the ends
     return (max_width_km * 1000.0 * sine_factor) + base_width_m
 
 
+def generate_grid_arrays(
+        origin: Tuple[float, float],
+        destination: Tuple[float, float],
+        n_rings: int,
+        n_angles: int,
+        ring_spacing_km: float,
+        max_width_km: float,
+        base_width_m: float,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Node latitudes and longitudes of the grid as float64 arrays, indexed by node ID.
+
+    Every ring width, spread angle and bearing is computed as an array and all
+    ring nodes are projected with a single batched v_inverse call.
+    """
+
+    # Calculate total distance and initial bearing from origin to destination
+    # v_direct returns (distance_in_meters, bearing_in_degrees)
+    total_dist_m, initial_bearing = v_direct(origin, destination)
+
+    # 1. RINGS
+    # Each ring is a row of nodes perpendicular to the origin-destination line.
+    # (ring_idx + 1) because we start at ring 1, not ring 0
+    ring_idx = np.arange(n_rings)
+    ring_dist_m = (ring_idx + 1) * ring_spacing_km * 1000.0
+
+    # Safety
+    # Rings that would be past the destination are not generated
+    n_actual = int(np.count_nonzero(ring_dist_m < total_dist_m))
+    ring_idx = ring_idx[:n_actual]
+    ring_dist_m = ring_dist_m[:n_actual]
+
+    # Width at every ring (uses the sine wave to create the cigar bulge)
+    width_m = _calculate_width_at_ring(ring_idx, n_rings, max_width_km, base_width_m)
+
+    # Opening angle of the cone at every ring: tan(angle) = half_width / distance
+    # Safety: if too close to origin, use 90 degrees to avoid issues
+    spread_angle_deg = np.where(
+        ring_dist_m < 1000,
+        90.0,
+        np.degrees(np.arctan((width_m / 2.0) / np.maximum(ring_dist_m, 1000))),
+    )
+
+    # Angular step between the nodes of a ring (no step with only 1 angle)
+    if n_angles > 1:
+        step_deg = (2 * spread_angle_deg) / (n_angles - 1)
+    else:
+        step_deg = np.zeros(n_actual)
+
+    # 2. BEARINGS
+    # Start from the left edge (-spread_angle_deg) and step right.
+    # Shape (ring, angle), flattened ring-major this is exactly the node numbering
+    angle_offset = -spread_angle_deg[:, None] + np.arange(n_angles)[None, :] * step_deg[:, None]
+    final_bearing = initial_bearing + angle_offset
+    dist_m = np.broadcast_to(ring_dist_m[:, None], final_bearing.shape)
+
+    # 3. PROJECT all ring nodes in one go
+    ring_lat, ring_lon, _ = v_inverse_batch(origin[0], origin[1], final_bearing.ravel(), dist_m.ravel())
+
+    # Origin is node 0, destination is the final node (after all rings)
+    lat = np.concatenate(([origin[0]], ring_lat, [destination[0]]))
+    lon = np.concatenate(([origin[1]], ring_lon, [destination[1]]))
+    return lat, lon
+
+
 def generate_grid(
         origin: Tuple[float, float],
         destination: Tuple[float, float],
@@ -57,106 +125,90 @@ def generate_grid(
     Generates a  2D grid of nodes between origin and destination.
     """
 
-    # 1. SETUP
-    # Initialize empty lists to store all nodes and their coordinates
-    nodes: List[Tuple[float, float]] = []
-    node_coords: NodeCoords = {}
+    lat, lon = generate_grid_arrays(
+        origin, destination, n_rings, n_angles, ring_spacing_km, max_width_km, base_width_m
+    )
 
-    # Add Origin (Node 0) (starting point)
-    nodes.append(origin)
-    node_coords[0] = origin
+    # Plain python lists and tuples, like the rest of the code expects
+    nodes: List[Tuple[float, float]] = list(zip(lat.tolist(), lon.tolist()))
+    nodes[0] = origin
+    nodes[-1] = destination
+    node_coords: NodeCoords = dict(enumerate(nodes))
 
-    # Start counting node IDs from 1 (since 0 is the origin)
-    next_node_id = 1
+    # Return both the list of coordinates and the mapping dictionary
+    return nodes, node_coords
 
-    # Calculate total distance and initial bearing from origin to destination
-    # v_direct returns (distance_in_meters, bearing_in_degrees)
-    total_dist_m, initial_bearing = v_direct(origin, destination)
 
-    # 2. GENERATE RINGS
-    # Each ring is a row of nodes perpendicular to the origin-destination line
-    for ring_idx in range(n_rings):
+def _lateral_moves(lateral_reach: int) -> List[int]:
+    """
+    Internal helper: the angle steps to the next ring, in expansion order:
+    straight, left, right, 2 left, 2 right, ...
+    """
+    moves = [0]
+    for d in range(1, lateral_reach + 1):
+        moves += [-d, d]
+    return moves
 
-        # Calculate how far forward this ring should be from the origin
-        # (ring_idx + 1) because we start at ring 1, not ring 0
-        current_dist_m = (ring_idx + 1) * ring_spacing_km * 1000.0
 
-        # Safety
-        # If the ring would be past the destination, stop generating rings
-        if current_dist_m >= total_dist_m:
-            break
+def generate_corridor_grid(
+        origin: Tuple[float, float],
+        destination: Tuple[float, float],
+        center_path: List[Tuple[float, float]],
+        ring_spacing_km: float,
+        n_angles: int,
+        half_width_km: float,
+) -> Tuple[List[Tuple[float, float]], NodeCoords]:
+    """
+    Generates a narrow grid around an existing route (for coarse-to-fine search).
 
-        # Calculate how wide the grid should be at this specific ring
-        # Uses the sine wave function to create the cigar bulge
-        current_width_m = _calculate_width_at_ring(
-            ring_idx, n_rings, max_width_km, base_width_m
-        )
+    The nodes are placed like in generate_grid (distance and bearing from the
+    origin, same node numbering), but every ring is centred on the route
+    instead of on the great circle, and only spans half_width_km to each side.
+    Near the origin and the destination the corridor narrows, so the angles
+    stay small.
+    """
+    total_dist_m, initial_bearing = v_direct(origin, destination)
+
+    # Where the route is: distance from the origin and angle off the great circle
+    path_lat = np.array([c[0] for c in center_path], dtype=float)
+    path_lon = np.array([c[1] for c in center_path], dtype=float)
+    path_dist_m, path_bearing, _ = v_direct_batch(origin[0], origin[1], path_lat, path_lon)
+    path_offset = (path_bearing - initial_bearing + 180.0) % 360.0 - 180.0
+    path_offset[path_dist_m == 0.0] = 0.0  # the origin itself has no bearing
+    order = np.argsort(path_dist_m, kind="stable")
+
+    # Rings at the new spacing, stopping before the destination
+    n_rings = int(np.ceil(total_dist_m / (ring_spacing_km * 1000.0))) - 1
+    ring_dist_m = np.arange(1, max(n_rings, 0) + 1) * ring_spacing_km * 1000.0
+    ring_dist_m = ring_dist_m[ring_dist_m < total_dist_m]
+
+    # Centre of every ring: the route, interpolated between its nodes
+    center_offset = np.interp(ring_dist_m, path_dist_m[order], path_offset[order])
+
+    # Half width of every ring in degrees, narrowing near the ends
+    half_width_m = np.minimum(half_width_km * 1000.0, 0.5 * np.minimum(ring_dist_m, total_dist_m - ring_dist_m))
+    spread_deg = np.degrees(np.arctan(half_width_m / ring_dist_m))
+    if n_angles > 1:
+        fraction = np.linspace(-1.0, 1.0, n_angles)
+    else:
+        fraction = np.zeros(1)
 
-        # Half-width is used for calculations (distance from center to edge)
-        half_width_m = current_width_m / 2.0
-
-        # Calculate the angular spread from the origin's perspective
-        # This is the opening angle how wide the cone opens at this distance
-        # Uses simple arctangent: tan(angle) = opposite/adjacent = half_width/distance
-        if current_dist_m < 1000:
-            # Safety: if too close to origin, use 90 degrees to avoid issues
-            spread_angle_rad = math.radians(90)
-        else:
-            # Calculate the angle based on width and distance
-            spread_angle_rad = math.atan(half_width_m / current_dist_m)
-
-        # Convert the spread angle from radians to degrees for easier calculations
-        spread_angle_deg = math.degrees(spread_angle_rad)
-
-        # Calculate the angular step between nodes in this ring
-        # We need to distribute n_angles nodes across the width
-        if n_angles > 1:
-            # Divide the total angular spread by (n_angles - 1) to get even spacing
-            # Example: 3 nodes need 2 gaps between them
-            step_deg = (2 * spread_angle_deg) / (n_angles - 1)
-        else:
-            # If only 1 angle, no stepping needed (just the center)
-            step_deg = 0
-
-        # Creating all the nodes for this ring
-        for angle_i in range(n_angles):
-            # Calculate the lateral offset for this specific node
-            # Start from the left edge (-spread_angle_deg) and step right
-            angle_offset = -spread_angle_deg + (angle_i * step_deg)
-            # Final bearing = straight-line bearing ± lateral offset
-            final_bearing = initial_bearing + angle_offset
-
-            # Project the new coordinate using the calculated bearing and distance
-            # v_inverse takes (start_lat, start_lon, bearing, distance)
-            # and returns (end_lat, end_lon)
-            lat, lon = v_inverse(origin[0], origin[1], final_bearing, current_dist_m)
-
-            # Add this node to our collections
-            nodes.append((lat, lon))
-            node_coords[next_node_id] = (lat, lon)
-            # Increment for the next node
-            next_node_id += 1
-
-    # 3. ADD DESTINATION
-    # The destination is the final node (after all rings)
-    nodes.append(destination)
-    node_coords[next_node_id] = destination
+    final_bearing = initial_bearing + center_offset[:, None] + spread_deg[:, None] * fraction[None, :]
+    dist_m = np.broadcast_to(ring_dist_m[:, None], final_bearing.shape)
+    ring_lat, ring_lon, _ = v_inverse_batch(origin[0], origin[1], final_bearing.ravel(), dist_m.ravel())
 
-    # Return both the list of coordinates and the mapping dictionary
+    nodes: List[Tuple[float, float]] = [origin] + list(zip(ring_lat.tolist(), ring_lon.tolist())) + [destination]
+    node_coords: NodeCoords = dict(enumerate(nodes))
     return nodes, node_coords
 
 
-def build_adjacency_list(
-        node_coords: NodeCoords,
-        n_rings: int,  # Kept for consistency, but ignored in logic
-        n_angles: int,
-        edge_cost_fn: EdgeCostFunc,
-) -> Graph:
+def _build_edge_arrays(end_node_id: int, n_angles: int, lateral_reach: int = 1) -> Tuple[np.ndarray, np.ndarray]:
     """
-    Builds the graph connections (Edges).
+    Internal helper: all edges of the grid as (sources, targets) arrays.
 
-    it can also detects the *actual* number of rings generated.
-    This prevents crashes if the grid generation stopped early.
+    Per source node the order is straight, left, right (then 2 left, 2 right,
+    ... for a larger lateral_reach), the same order the solvers always
+    expanded them in.
     """
 
     # --- 1. DETECT GRID STRUCTURE ---
@@ -164,67 +216,136 @@ def build_adjacency_list(
     # (might be less than n_rings if we hit the destination early)
     # Logic: Destination ID = 1 + (Rings * Angles)
     # Therefore: Rings = (Dest_ID - 1) / Angles
-
     start_node_id = 0
-    # Destination is always the highest node ID
-    end_node_id = max(node_coords.keys())
 
-    # Calculate actual rings: Total nodes = 1 (origin) + (rings × angles) + 1 (destination)
-    # So: rings = (end_node_id - 1) / angles
     # use integer division to get the exact number of complete rings
     actual_n_rings = (end_node_id - 1) // n_angles
 
-    # Helper: Calculate ID of a specific node
+    # Node IDs of all the ring nodes, as a (ring, angle) table
     # Formula: node_id = 1 + (ring_index × n_angles) + angle_index
     # The +1 is because node 0 is the origin
-    def get_id(ring_idx: int, angle_idx: int) -> int:
-        return 1 + (ring_idx * n_angles) + angle_idx
+    ids = 1 + np.arange(actual_n_rings * n_angles, dtype=np.int64).reshape(actual_n_rings, n_angles)
 
-    # Initialize list to store all edges (connections between nodes)
-    edges: List[Tuple[int, int]] = []
-
-    # ------------------------------------------------------------------------------------------------------------------
-    # Build the structure so which node connects to which
-
-    # 1: Connect start to the first ring
-    if actual_n_rings > 0:
-        # Connect origin to every node in ring 0
-        for k in range(n_angles):
-            target_node = get_id(0, k)
-            edges.append((start_node_id, target_node))
-    else:
+    if actual_n_rings == 0:
         # if no rings fit, connect start directly to end
-        edges.append((start_node_id, end_node_id))
+        return np.array([start_node_id], dtype=np.int64), np.array([end_node_id], dtype=np.int64)
+
+    # 1: Connect start to every node in the first ring
+    start_sources = np.full(n_angles, start_node_id, dtype=np.int64)
+    start_targets = ids[0]
 
     # 2: Ring -> Ring (Internal)
-    # We connect Ring `r` to Ring `r+1`, so that we stop at actual_n_rings - 1
-    for r in range(actual_n_rings - 1):
-        # For each node in the current ring
-        for k in range(n_angles):
-            # Get the ID of the current source node
-            src_node = get_id(r, k)
+    # Ring `r` connects to ring `r+1`: straight, left diagonal (if not on the left edge)
+    # and right diagonal (if not on the right edge)
+    k = np.arange(n_angles)
+    steps = _lateral_moves(lateral_reach)
+    moves = k[:, None] + np.array(steps)[None, :]  # (angle, move)
+    valid = (moves >= 0) & (moves < n_angles)
+    ring_sources = np.broadcast_to(ids[:-1, :, None], (actual_n_rings - 1, n_angles, len(steps)))
+    ring_targets = ids[1:, np.clip(moves, 0, n_angles - 1)]  # (ring, angle, move)
+    mask = np.broadcast_to(valid, ring_sources.shape)
 
-            # 1. Straight connection
-            edges.append((src_node, get_id(r + 1, k)))
+    # 3: Last Ring -> END
+    end_sources = ids[-1]
+    end_targets = np.full(n_angles, end_node_id, dtype=np.int64)
 
-            # 2. Left Diagonal (if not on left edge)
-            if k > 0:
-                edges.append((src_node, get_id(r + 1, k - 1)))
+    sources = np.concatenate([start_sources, ring_sources[mask], end_sources])
+    targets = np.concatenate([start_targets, ring_targets[mask], end_targets])
+    return sources, targets
 
-            # 3. Right Diagonal (if not on right edge)
-            if k < n_angles - 1:
-                edges.append((src_node, get_id(r + 1, k + 1)))
 
-    # 3: Last Ring -> END
-    if actual_n_rings > 0:
-        # The last ring is at index (actual_n_rings - 1)
-        last_ring_idx = actual_n_rings - 1
-        # Connect every node in the last ring to the destination
-        for k in range(n_angles):
-            src_node = get_id(last_ring_idx, k)
-            edges.append((src_node, end_node_id))
-
-    # 4. Build graph structure (adjacency list)
+def _limit_track_change(
+        node_coords: NodeCoords,
+        sources: np.ndarray,
+        targets: np.ndarray,
+        n_angles: int,
+        end_node_id: int,
+        max_track_change_deg: float,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Internal helper: drop the ring -> ring edges whose initial heading differs
+    more than max_track_change_deg from the straight edge of the same node.
+
+    The straight move follows the grid, so this limits how sharply a route
+    can turn away from it, independent of the ring spacing. The edges from
+    the origin and to the destination are always kept.
+    """
+    inner = (sources != 0) & (targets != end_node_id)
+    src = sources[inner]
+    tgt = targets[inner]
+    straight = src + n_angles  # same angle index in the next ring
+
+    def coords(ids: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        lat = np.array([node_coords[i][0] for i in ids.tolist()], dtype=float)
+        lon = np.array([node_coords[i][1] for i in ids.tolist()], dtype=float)
+        return lat, lon
+
+    lat_a, lon_a = coords(src)
+    lat_b, lon_b = coords(tgt)
+    lat_s, lon_s = coords(straight)
+    _, heading, _ = v_direct_batch(lat_a, lon_a, lat_b, lon_b)
+    _, heading_straight, _ = v_direct_batch(lat_a, lon_a, lat_s, lon_s)
+
+    # Heading difference wrapped to [-180, 180)
+    track_change = np.abs((heading - heading_straight + 180.0) % 360.0 - 180.0)
+
+    keep = np.ones(len(sources), dtype=bool)
+    keep[inner] = (tgt == straight) | (track_change <= max_track_change_deg)
+    return sources[keep], targets[keep]
+
+
+def _grid_edges(
+        node_coords: NodeCoords,
+        n_angles: int,
+        lateral_reach: int = 1,
+        max_track_change_deg: Optional[float] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Internal helper: the edge arrays of the grid, with the optional turn limit applied.
+    """
+    # Destination is always the highest node ID
+    end_node_id = max(node_coords.keys())
+    sources, targets = _build_edge_arrays(end_node_id, n_angles, lateral_reach)
+    if max_track_change_deg is not None:
+        sources, targets = _limit_track_change(
+            node_coords, sources, targets, n_angles, end_node_id, max_track_change_deg
+        )
+    return sources, targets
+
+
+def build_adjacency_list(
+        node_coords: NodeCoords,
+        n_rings: int,  # Kept for consistency, but ignored in logic
+        n_angles: int,
+        edge_cost_fn: EdgeCostFunc,
+        edge_geometry: Optional[EdgeGeometryTable] = None,
+        lateral_reach: int = 1,
+        max_track_change_deg: Optional[float] = None,
+) -> Graph:
+    """
+    Builds the graph connections (Edges).
+
+    it can also detects the *actual* number of rings generated.
+    This prevents crashes if the grid generation stopped early.
+
+    If an EdgeGeometryTable is passed, it is filled with the static geometry
+    (distance, heading, ANSP cost) of every edge, so the physics engine does
+    not have to solve the geodesic again during the search.
+
+    lateral_reach is how many angles a route may move sideways per ring
+    (1 = straight, left and right). max_track_change_deg (optional) drops the
+    edges that turn more than that from the straight edge, so the turn limit
+    no longer depends on the ring spacing.
+    """
+
+    # Destination is always the highest node ID
+    end_node_id = max(node_coords.keys())
+
+    # Build the structure so which node connects to which
+    sources, targets = _grid_edges(node_coords, n_angles, lateral_reach, max_track_change_deg)
+    edges: List[Tuple[int, int]] = list(zip(sources.tolist(), targets.tolist()))
+
+    # Build graph structure (adjacency list)
     graph: Graph = defaultdict(list)
 
     for u, v in edges:
@@ -238,4 +359,45 @@ def build_adjacency_list(
     if end_node_id not in graph:
         graph[end_node_id] = []
 
-    return graph
\ No newline at end of file
+    # Static edge geometry (computed once for the whole graph)
+    if edge_geometry is not None:
+        edge_geometry.fill(node_coords, edges)
+
+    return graph
+
+
+def build_grid_graph(
+        node_coords: NodeCoords,
+        n_rings: int,  # Kept for consistency, but ignored in logic
+        n_angles: int,
+        edge_cost_fn: Optional[EdgeCostFunc] = None,
+        edge_geometry: Optional[EdgeGeometryTable] = None,
+        lateral_reach: int = 1,
+        max_track_change_deg: Optional[float] = None,
+) -> GridGraph:
+    """
+    Same edges as build_adjacency_list, but stored as an array-backed GridGraph.
+
+    Without edge_cost_fn every static cost is 0.0 (the solvers calculate the
+    costs dynamically anyway). graph.adjacency and graph.node_coords can be
+    passed wherever the dict versions were used.
+    """
+    end_node_id = max(node_coords.keys())
+    sources, targets = _grid_edges(node_coords, n_angles, lateral_reach, max_track_change_deg)
+
+    lat = np.array([node_coords[i][0] for i in range(end_node_id + 1)], dtype=float)
+    lon = np.array([node_coords[i][1] for i in range(end_node_id + 1)], dtype=float)
+
+    costs = None
+    if edge_cost_fn is not None:
+        costs = np.array([
+            edge_cost_fn(node_coords[u], node_coords[v])
+            for u, v in zip(sources.tolist(), targets.tolist())
+        ], dtype=float)
+
+    graph = GridGraph.from_edges(lat, lon, n_angles, sources, targets, costs)
+
+    if edge_geometry is not None:
+        edge_geometry.fill(node_coords, zip(sources.tolist(), targets.tolist()))
+
+    return graph
@@ -0,0 +1,194 @@
+from collections.abc import Mapping
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+# For readability purposes
+Coord = Tuple[float, float]  # (lat, lon)
+
+
+class GridGraph:
+    """
+    Array-backed (CSR) version of the grid graph.
+
+    The outgoing edges of node u are indices[offsets[u]:offsets[u + 1]],
+    with their static costs at the same positions in costs. The nodes are
+    stored as float64 lat/lon arrays plus the ring and angle index of every
+    node (-1 for the angle of the origin and the destination, -1 and
+    n_rings for their ring).
+
+    A dict-of-tuples graph needs a python object per edge, this needs
+    16 bytes per edge and 24 per node, so it also fits grids with hundreds
+    of thousands of nodes. The old dict API is kept as two thin views:
+    `adjacency` (node -> [(neighbor, cost), ...]) and `node_coords`
+    (node -> (lat, lon)).
+    """
+
+    def __init__(
+            self,
+            offsets: np.ndarray,
+            indices: np.ndarray,
+            costs: np.ndarray,
+            lat: np.ndarray,
+            lon: np.ndarray,
+            ring: np.ndarray,
+            angle: np.ndarray,
+            n_angles: int,
+    ):
+        self.offsets = np.ascontiguousarray(offsets, dtype=np.int64)
+        self.indices = np.ascontiguousarray(indices, dtype=np.int64)
+        self.costs = np.ascontiguousarray(costs, dtype=float)
+        self.lat = np.ascontiguousarray(lat, dtype=float)
+        self.lon = np.ascontiguousarray(lon, dtype=float)
+        self.ring = np.ascontiguousarray(ring, dtype=np.int32)
+        self.angle = np.ascontiguousarray(angle, dtype=np.int32)
+        self.n_angles = n_angles
+
+        if len(self.offsets) != len(self.lat) + 1:
+            raise ValueError("offsets should have one entry more than there are nodes")
+        if len(self.indices) != self.offsets[-1] or len(self.costs) != len(self.indices):
+            raise ValueError("indices and costs do not match the offsets")
+
+        self.n_nodes = len(self.lat)
+        self.n_edges = len(self.indices)
+        self.start_node = 0
+        self.end_node = self.n_nodes - 1
+        self.n_rings = int(self.ring.max(initial=0))
+
+        self.adjacency = AdjacencyView(self)
+        self.node_coords = NodeCoordsView(self)
+
+    @classmethod
+    def from_edges(
+            cls,
+            lat: np.ndarray,
+            lon: np.ndarray,
+            n_angles: int,
+            sources: np.ndarray,
+            targets: np.ndarray,
+            costs: Optional[np.ndarray] = None,
+    ) -> "GridGraph":
+        """
+        Build the CSR arrays from an edge list. The edges of one node keep
+        the order in which they appear in the list.
+        """
+        sources = np.asarray(sources, dtype=np.int64)
+        targets = np.asarray(targets, dtype=np.int64)
+        if costs is None:
+            costs = np.zeros(len(sources))
+        costs = np.asarray(costs, dtype=float)
+
+        n_nodes = len(lat)
+        order = np.argsort(sources, kind="stable")
+        counts = np.bincount(sources, minlength=n_nodes)
+        offsets = np.zeros(n_nodes + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+
+        # Node IDs: 0 = origin, 1 + ring * n_angles + angle, last = destination
+        node_ids = np.arange(n_nodes)
+        ring = (node_ids - 1) // n_angles
+        angle = (node_ids - 1) % n_angles
+        ring[0] = -1
+        angle[0] = -1
+        ring[-1] = (n_nodes - 2) // n_angles
+        angle[-1] = -1
+
+        return cls(offsets, targets[order], costs[order], lat, lon, ring, angle, n_angles)
+
+    def successors(self, u: int) -> np.ndarray:
+        """
+        Neighbor IDs of u (a view on the indices array, no copy).
+        """
+        return self.indices[self.offsets[u]:self.offsets[u + 1]]
+
+    def successor_costs(self, u: int) -> np.ndarray:
+        return self.costs[self.offsets[u]:self.offsets[u + 1]]
+
+    def out_degree(self, u: int) -> int:
+        return int(self.offsets[u + 1] - self.offsets[u])
+
+    def edges(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        All edges as (sources, targets) arrays, in CSR order.
+        """
+        sources = np.repeat(np.arange(self.n_nodes, dtype=np.int64), np.diff(self.offsets))
+        return sources, self.indices
+
+    def coords(self) -> np.ndarray:
+        """
+        (n_nodes, 2) array of lat/lon.
+        """
+        return np.column_stack((self.lat, self.lon))
+
+    def to_adjacency_list(self) -> Dict[int, List[Tuple[int, float]]]:
+        """
+        A real dict copy in the format of build_adjacency_list
+        (faster to index in a hot loop than the adjacency view).
+        """
+        neighbors = self.indices.tolist()
+        costs = self.costs.tolist()
+        bounds = self.offsets.tolist()
+        return {
+            u: list(zip(neighbors[bounds[u]:bounds[u + 1]], costs[bounds[u]:bounds[u + 1]]))
+            for u in range(self.n_nodes)
+        }
+
+    def to_node_coords(self) -> Dict[int, Coord]:
+        return dict(enumerate(zip(self.lat.tolist(), self.lon.tolist())))
+
+    @property
+    def nbytes(self) -> int:
+        return sum(a.nbytes for a in (self.offsets, self.indices, self.costs, self.lat, self.lon, self.ring, self.angle))
+
+
+class AdjacencyView(Mapping):
+    """
+    Read-only dict view: node -> [(neighbor, cost), ...], like build_adjacency_list.
+    The lists are made on access, nothing is stored per edge.
+    """
+
+    def __init__(self, graph: GridGraph):
+        self._graph = graph
+
+    def __getitem__(self, u: int) -> List[Tuple[int, float]]:
+        g = self._graph
+        if not 0 <= u < g.n_nodes:
+            raise KeyError(u)
+        lo, hi = int(g.offsets[u]), int(g.offsets[u + 1])
+        return list(zip(g.indices[lo:hi].tolist(), g.costs[lo:hi].tolist()))
+
+    def __contains__(self, u) -> bool:
+        return isinstance(u, (int, np.integer)) and 0 <= u < self._graph.n_nodes
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(range(self._graph.n_nodes))
+
+    def __len__(self) -> int:
+        return self._graph.n_nodes
+
+    def successors(self, u: int) -> np.ndarray:
+        return self._graph.successors(u)
+
+
+class NodeCoordsView(Mapping):
+    """
+    Read-only dict view: node -> (lat, lon), like generate_grid's node_coords.
+    """
+
+    def __init__(self, graph: GridGraph):
+        self._graph = graph
+
+    def __getitem__(self, u: int) -> Coord:
+        g = self._graph
+        if not 0 <= u < g.n_nodes:
+            raise KeyError(u)
+        return float(g.lat[u]), float(g.lon[u])
+
+    def __contains__(self, u) -> bool:
+        return isinstance(u, (int, np.integer)) and 0 <= u < self._graph.n_nodes
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(range(self._graph.n_nodes))
+
+    def __len__(self) -> int:
+        return self._graph.n_nodes
@@ -0,0 +1,51 @@
+from array import array
+from typing import List
+
+
+class LabelBuffer:
+    """
+    Every state (label) the solver pushes, stored as struct-of-arrays.
+
+    A label is only an index: node[i], time_sec[i], weight_kg[i], cost[i]
+    and parent[i] (the index of the label it came from, -1 for the start).
+    The arrays hold raw 8 byte values, so a label takes 40 bytes instead of
+    a tuple of python floats plus a dict entry keyed by floats, and the
+    path is rebuilt by following integer parent links.
+    """
+
+    __slots__ = ("node", "time_sec", "weight_kg", "cost", "parent")
+
+    def __init__(self):
+        self.node = array("q")
+        self.time_sec = array("d")
+        self.weight_kg = array("d")
+        self.cost = array("d")
+        self.parent = array("q")
+
+    def add(self, node: int, time_sec: float, weight_kg: float, cost: float, parent: int) -> int:
+        """
+        Store a new label and return its index.
+        """
+        self.node.append(node)
+        self.time_sec.append(time_sec)
+        self.weight_kg.append(weight_kg)
+        self.cost.append(cost)
+        self.parent.append(parent)
+        return len(self.node) - 1
+
+    def path(self, label: int) -> List[int]:
+        """
+        Node IDs from the start to this label.
+        """
+        nodes = []
+        while label >= 0:
+            nodes.append(self.node[label])
+            label = self.parent[label]
+        return nodes[::-1]
+
+    @property
+    def nbytes(self) -> int:
+        return sum(a.itemsize * len(a) for a in (self.node, self.time_sec, self.weight_kg, self.cost, self.parent))
+
+    def __len__(self) -> int:
+        return len(self.node)
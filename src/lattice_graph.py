@@ -0,0 +1,121 @@
+from collections.abc import Mapping
+from typing import Iterator, List, Tuple
+
+import numpy as np
+
+from .grid import NodeCoords, _build_edge_arrays, _lateral_moves
+
+
+class LatticeGraph(Mapping):
+    """
+    Implicit version of the grid graph: no edges are stored at all.
+
+    The grid is fully regular (node_id = 1 + ring * n_angles + angle, the
+    origin is 0 and the destination is the last node), so the successors of
+    a node are computed from its ID: the straight, left and right node in the
+    next ring, or up to ±lateral_reach angles to the side.
+
+    It behaves like the dict of build_adjacency_list (node -> [(neighbor, 0.0), ...]),
+    so it can be passed to the solvers as it is, and like a GridGraph for the
+    bee colony (successors).
+    """
+
+    def __init__(self, n_rings: int, n_angles: int, lateral_reach: int = 1):
+        if n_angles < 1:
+            raise ValueError("a lattice needs at least 1 angle per ring")
+        if lateral_reach < 0:
+            raise ValueError("lateral_reach cannot be negative")
+
+        self.n_rings = n_rings  # rings that were actually generated
+        self.n_angles = n_angles
+        self.lateral_reach = lateral_reach
+        self.start_node = 0
+        self.end_node = 1 + n_rings * n_angles
+        self.n_nodes = self.end_node + 1
+        self._moves = _lateral_moves(lateral_reach)
+
+    @classmethod
+    def from_node_coords(cls, node_coords: NodeCoords, n_angles: int, lateral_reach: int = 1) -> "LatticeGraph":
+        """
+        Detect the actual number of rings like build_adjacency_list does
+        (the grid generation may have stopped early).
+        """
+        end_node_id = max(node_coords.keys())
+        return cls((end_node_id - 1) // n_angles, n_angles, lateral_reach)
+
+    def ring_angle(self, u: int) -> Tuple[int, int]:
+        """
+        (ring, angle) of a ring node.
+        """
+        return divmod(u - 1, self.n_angles)
+
+    def successors(self, u: int) -> List[int]:
+        """
+        Neighbor IDs of u, in the order straight, left, right, 2 left, 2 right, ...
+        """
+        if u == self.end_node:
+            return []
+        if u == self.start_node:
+            if self.n_rings == 0:
+                return [self.end_node]  # if no rings fit, connect start directly to end
+            return list(range(1, 1 + self.n_angles))
+        if not 0 < u < self.end_node:
+            raise KeyError(u)
+
+        ring, angle = divmod(u - 1, self.n_angles)
+        if ring == self.n_rings - 1:
+            return [self.end_node]  # last ring -> destination
+
+        base = 1 + (ring + 1) * self.n_angles
+        n_angles = self.n_angles
+        return [base + angle + d for d in self._moves if 0 <= angle + d < n_angles]
+
+    def n_successors(self, u: int) -> int:
+        """
+        Out degree of u, without making the neighbor list.
+        """
+        if u == self.end_node:
+            return 0
+        if u == self.start_node:
+            return self.n_angles if self.n_rings > 0 else 1
+        if not 0 < u < self.end_node:
+            raise KeyError(u)
+
+        ring, angle = divmod(u - 1, self.n_angles)
+        if ring == self.n_rings - 1:
+            return 1
+        reach = self.lateral_reach
+        return 1 + min(angle, reach) + min(self.n_angles - 1 - angle, reach)
+
+    def edges(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        All edges as (sources, targets) arrays, for example to fill an EdgeGeometryTable.
+        """
+        return _build_edge_arrays(self.end_node, self.n_angles, self.lateral_reach)
+
+    @property
+    def n_edges(self) -> int:
+        """
+        Number of edges, counted from the lattice shape without making them.
+        """
+        if self.n_rings == 0:
+            return 1  # start -> end
+        reach = self.lateral_reach
+        per_ring = sum(
+            1 + min(angle, reach) + min(self.n_angles - 1 - angle, reach) for angle in range(self.n_angles)
+        )
+        # start -> first ring, every ring but the last -> next ring, last ring -> end
+        return self.n_angles + (self.n_rings - 1) * per_ring + self.n_angles
+
+    # Dict API, the same as build_adjacency_list (all static costs are 0.0)
+    def __getitem__(self, u: int) -> List[Tuple[int, float]]:
+        return [(v, 0.0) for v in self.successors(u)]
+
+    def __contains__(self, u) -> bool:
+        return isinstance(u, (int, np.integer)) and 0 <= u < self.n_nodes
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(range(self.n_nodes))
+
+    def __len__(self) -> int:
+        return self.n_nodes
@@ -0,0 +1,129 @@
+from typing import Callable, List, NamedTuple, Optional, Sequence, Tuple
+
+from .edge_geometry import EdgeGeometryTable
+from .grid import NodeCoords, generate_grid, generate_corridor_grid, build_adjacency_list
+from .solver_1 import solve_dynamic_dijkstra
+
+# For readability purposes
+Coord = Tuple[float, float]  # (lat, lon)
+# Makes the physics_engine_fn of a grid: (node_coords, edge_geometry) -> physics_engine_fn
+PhysicsFactory = Callable[[NodeCoords, EdgeGeometryTable], Callable]
+# Makes the A* heuristic of a grid: (node_coords, edge_geometry) -> lower bound of the cost to go per node
+HeuristicFactory = Callable[[NodeCoords, EdgeGeometryTable], Sequence[float]]
+
+
+class CoarseGrid(NamedTuple):
+    """
+    The first, full-width grid (same parameters as generate_grid).
+    """
+    n_rings: int
+    n_angles: int
+    ring_spacing_km: float
+    max_width_km: float
+    base_width_m: float
+
+
+class CorridorLevel(NamedTuple):
+    """
+    One refinement step: a corridor around the previous route.
+    """
+    ring_spacing_km: float
+    n_angles: int
+    half_width_km: float
+
+
+class LevelResult(NamedTuple):
+    n_nodes: int
+    path_ids: List[int]
+    path_coords: List[Coord]
+    cost: float
+    states: int
+
+
+def solve_multi_resolution(
+        origin: Coord,
+        destination: Coord,
+        coarse: CoarseGrid,
+        levels: List[CorridorLevel],
+        make_physics_fn: PhysicsFactory,
+        initial_weight_kg: float,
+        start_time_sec: float = 0.0,
+        time_bin_sec: float = 100.0,
+        target_time_range_sec: Optional[Tuple[float, float]] = None,
+        lateral_reach: int = 1,
+        make_heuristic_fn: Optional[HeuristicFactory] = None,
+) -> List[LevelResult]:
+    """
+    Coarse-to-fine route search.
+
+    First Dijkstra is solved on the coarse grid. Then for every level a narrow
+    corridor grid (finer rings and angles, only near the route found so far)
+    is built and solved again. A fine resolution is only spent where the
+    route can actually be, so the amount of states stays far below the
+    amount of a full fine grid.
+
+    With make_heuristic_fn, every level is solved with A* instead.
+
+    The corridor does not contain the nodes of the previous route, so a
+    finer level can find a more expensive route. Every corridor is
+    therefore built around the cheapest route so far (the incumbent),
+    and the final route is the cheapest of all levels (best_result).
+
+    Returns the result of every level, in order.
+    If a level finds no route, the search stops.
+    """
+    results: List[LevelResult] = []
+
+    # 1. Coarse grid
+    _, node_coords = generate_grid(
+        origin, destination, coarse.n_rings, coarse.n_angles,
+        coarse.ring_spacing_km, coarse.max_width_km, coarse.base_width_m
+    )
+    grids = [(node_coords, coarse.n_rings, coarse.n_angles)]
+
+    # 2. Corridors around the previous route
+    for i in range(len(levels) + 1):
+        node_coords, n_rings, n_angles = grids[-1]
+        edge_geometry = EdgeGeometryTable()
+        graph = build_adjacency_list(
+            node_coords, n_rings, n_angles, lambda a, b: 0.0,
+            edge_geometry=edge_geometry, lateral_reach=lateral_reach
+        )
+        end_node_id = max(node_coords.keys())
+
+        path, cost, states = solve_dynamic_dijkstra(
+            adjacency_list=graph,
+            node_coords=node_coords,
+            start_node_id=0,
+            end_node_id=end_node_id,
+            initial_weight_kg=initial_weight_kg,
+            start_time_sec=start_time_sec,
+            physics_engine_fn=make_physics_fn(node_coords, edge_geometry),
+            time_bin_sec=time_bin_sec,
+            target_time_range_sec=target_time_range_sec,
+            heuristic=make_heuristic_fn(node_coords, edge_geometry) if make_heuristic_fn is not None else None
+        )
+        if not path:
+            break
+
+        path_coords = [node_coords[nid] for nid in path]
+        results.append(LevelResult(len(node_coords), path, path_coords, cost, states))
+
+        if i == len(levels):
+            break
+        level = levels[i]
+        incumbent = best_result(results)
+        _, corridor_coords = generate_corridor_grid(
+            origin, destination, incumbent.path_coords, level.ring_spacing_km, level.n_angles, level.half_width_km
+        )
+        corridor_rings = (len(corridor_coords) - 2) // level.n_angles
+        grids.append((corridor_coords, corridor_rings, level.n_angles))
+
+    return results
+
+
+def best_result(results: List[LevelResult]) -> LevelResult:
+    """
+    The cheapest route of all levels (the first one if costs are equal).
+    """
+    return min(results, key=lambda result: result.cost)
@@ -0,0 +1,63 @@
+from bisect import bisect_left, bisect_right
+from typing import Iterator, List, Tuple
+
+
+class ParetoFront:
+    """
+    The non-dominated (cost, weight) labels of one (node, time bin).
+
+    Lower cost and higher weight (more fuel left) are better. A label is
+    dominated by another one that is at most as expensive and at least as
+    heavy. On the front the costs are sorted ascending, and then the weights
+    are ascending as well (a more expensive label is only kept if it is
+    heavier). So the best weight for a cost is found with one binary search,
+    instead of scanning and rebuilding the whole list on every pop.
+
+    epsilon_cost / epsilon_weight make the dominance test looser: a label
+    also counts as dominated if it is at most epsilon_cost cheaper or
+    epsilon_weight heavier than a label on the front. 0.0 is exact dominance.
+    """
+
+    __slots__ = ("costs", "weights", "epsilon_cost", "epsilon_weight")
+
+    def __init__(self, epsilon_cost: float = 0.0, epsilon_weight: float = 0.0):
+        self.costs: List[float] = []
+        self.weights: List[float] = []
+        self.epsilon_cost = epsilon_cost
+        self.epsilon_weight = epsilon_weight
+
+    def best_weight(self, cost: float) -> float:
+        """
+        Highest weight of a label that costs at most cost (-inf if none).
+        """
+        i = bisect_right(self.costs, cost)
+        return self.weights[i - 1] if i > 0 else float("-inf")
+
+    def dominates(self, cost: float, weight: float) -> bool:
+        """
+        True if a label on the front is at least as good as (cost, weight),
+        within the epsilons.
+        """
+        return self.best_weight(cost + self.epsilon_cost) >= weight - self.epsilon_weight
+
+    def insert(self, cost: float, weight: float) -> bool:
+        """
+        Add a label unless it is dominated. Labels that the new one dominates
+        (exactly) are removed. Returns True if the label was added.
+        """
+        if self.dominates(cost, weight):
+            return False
+
+        # The dominated labels are the ones from cost on with a weight up to
+        # weight. The weights are ascending, so they are one block.
+        start = bisect_left(self.costs, cost)
+        end = bisect_right(self.weights, weight, lo=start)
+        self.costs[start:end] = [cost]
+        self.weights[start:end] = [weight]
+        return True
+
+    def __len__(self) -> int:
+        return len(self.costs)
+
+    def __iter__(self) -> Iterator[Tuple[float, float]]:
+        return iter(zip(self.costs, self.weights))
@@ -0,0 +1,98 @@
+import sys
+from array import array
+from pathlib import Path
+from typing import Callable, List, Optional
+
+import numpy as np
+
+# A trace sink is any object with record(node_id). solve_dynamic_dijkstra
+# calls it once for every popped state when a sink is given (trace=...).
+
+
+class RingBufferTrace:
+    """
+    Keeps the last `capacity` popped node IDs in memory, without any I/O.
+    """
+
+    def __init__(self, capacity: int = 1_000_000):
+        if capacity < 1:
+            raise ValueError("a ring buffer needs a capacity of at least 1")
+        self.capacity = capacity
+        self.total = 0  # how many states were recorded, also the ones that were overwritten
+        self._buffer = array("i", bytes(4 * capacity))
+
+    def record(self, node_id: int) -> None:
+        self._buffer[self.total % self.capacity] = node_id
+        self.total += 1
+
+    def history(self) -> List[int]:
+        """
+        The recorded node IDs, oldest first.
+        """
+        if self.total <= self.capacity:
+            return self._buffer[:self.total].tolist()
+        start = self.total % self.capacity
+        return (self._buffer[start:] + self._buffer[:start]).tolist()
+
+    def __len__(self) -> int:
+        return min(self.total, self.capacity)
+
+
+class BinaryTraceFile:
+    """
+    Writes the popped node IDs to a file as raw little endian int32.
+
+    The IDs are collected in memory and written in blocks of buffer_size,
+    so the search loop does not make a system call per state. Use it as a
+    context manager (or call close) so the last block is written too.
+    Read it back with read_trace.
+    """
+
+    def __init__(self, path, buffer_size: int = 65536):
+        self.path = Path(path)
+        self.buffer_size = buffer_size
+        self._buffer = array("i")
+        self._file = open(self.path, "wb")
+
+    def record(self, node_id: int) -> None:
+        self._buffer.append(node_id)
+        if len(self._buffer) >= self.buffer_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if self._buffer:
+            if sys.byteorder != "little":
+                self._buffer.byteswap()
+            self._buffer.tofile(self._file)
+            self._buffer = array("i")
+        self._file.flush()
+
+    def close(self) -> None:
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+
+    def __enter__(self) -> "BinaryTraceFile":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class CallbackTrace:
+    """
+    Calls a function with every popped node ID, for example to update a live plot.
+    """
+
+    def __init__(self, callback: Callable[[int], None]):
+        self.callback = callback
+
+    def record(self, node_id: int) -> None:
+        self.callback(node_id)
+
+
+def read_trace(path, count: Optional[int] = None) -> np.ndarray:
+    """
+    Node IDs of a BinaryTraceFile, in the order they were popped.
+    """
+    return np.fromfile(path, dtype="<i4", count=-1 if count is None else count)
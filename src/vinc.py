@@ -8,7 +8,11 @@ My work was mostly to adapt it to python.
 
 Have Fun
 """
-    
+
+from math import atan, atan2, acos, cos, radians, sin, sqrt, tan, pi
+
+import numpy as np
+
 def v_direct(coord1,coord2,maxIter=200,tol=10**-12):
     if coord1 == coord2:
         m=0
@@ -16,14 +20,6 @@ def v_direct(coord1,coord2,maxIter=200,tol=10**-12):
         return m, az12
         
     # Tolerance (tol) in meters
-    from math import atan
-    from math import atan2
-    from math import cos
-    from math import radians
-    from math import sin
-    from math import sqrt
-    from math import tan
-    from math import pi
     # Test Variables
     # maxIter=200
     # tol=10**-12
@@ -88,15 +84,6 @@ def v_direct(coord1,coord2,maxIter=200,tol=10**-12):
     return m, az12
     
 def v_inverse(lat1,lon1,az12,s):
-    from math import pi
-    from math import sin
-    from math import cos
-    from math import tan
-    from math import atan
-    from math import atan2
-    from math import acos
-    from math import sqrt
-    
     # Define some constants
     d2r = 180/pi;
     twopi = 2*pi;
@@ -198,6 +185,177 @@ def v_inverse(lat1,lon1,az12,s):
         
     return lat2,lon2
     
+def v_direct_batch(lat1,lon1,lat2,lon2,maxIter=200,tol=10**-12):
+    """
+    Array version of v_direct. All coordinate pairs are iterated together,
+    every argument may be a scalar or an array (they are broadcast).
+
+    Returns (m, az12, converged): distance in meters, initial azimuth in
+    degrees and a boolean mask telling which pairs reached the tolerance.
+    """
+    lat1,lon1,lat2,lon2=np.broadcast_arrays(*(np.asarray(x,dtype=float) for x in (lat1,lon1,lat2,lon2)))
+    shape=lat1.shape
+    lat1,lon1,lat2,lon2=(np.atleast_1d(x).ravel() for x in (lat1,lon1,lat2,lon2))
+
+    #--- CONSTANTS (same as v_direct) -----------------+
+    a=6378137.0                             # radius at equator in meters (WGS-84)
+    f=1/298.257223563                       # flattening of the ellipsoid (WGS-84)
+    b=(1-f)*a
+
+    m=np.zeros(lat1.shape)
+    az12=np.zeros(lat1.shape)
+
+    # coincident points are "converged" with m=0 and az12=0, just like v_direct
+    same=(lat1==lat2)&(lon1==lon2)
+    converged=same.copy()
+    idx=np.nonzero(~same)
+    if idx[0].size==0:
+        return m.reshape(shape), az12.reshape(shape), converged.reshape(shape)
+
+    u_1=np.arctan((1-f)*np.tan(np.radians(lat1[idx])))
+    u_2=np.arctan((1-f)*np.tan(np.radians(lat2[idx])))
+    L=np.radians(lon2[idx]-lon1[idx])
+
+    sin_u1=np.sin(u_1)
+    cos_u1=np.cos(u_1)
+    sin_u2=np.sin(u_2)
+    cos_u2=np.cos(u_2)
+
+    def terms(Lambda,k):
+        # the iteration terms for the pairs selected by k at the given lambda
+        cos_lambda=np.cos(Lambda)
+        sin_lambda=np.sin(Lambda)
+        sin_sigma=np.sqrt((cos_u2[k]*sin_lambda)**2+(cos_u1[k]*sin_u2[k]-sin_u1[k]*cos_u2[k]*cos_lambda)**2)
+        cos_sigma=sin_u1[k]*sin_u2[k]+cos_u1[k]*cos_u2[k]*cos_lambda
+        sigma=np.arctan2(sin_sigma,cos_sigma)
+        sin_alpha=(cos_u1[k]*cos_u2[k]*sin_lambda)/sin_sigma
+        cos_sq_alpha=1-sin_alpha**2
+        cos2_sigma_m=cos_sigma-((2*sin_u1[k]*sin_u2[k])/cos_sq_alpha)
+        return cos_lambda,sin_lambda,sin_sigma,cos_sigma,sigma,sin_alpha,cos_sq_alpha,cos2_sigma_m
+
+    #--- BEGIN ITERATIONS -----------------------------+
+    # Lambda_eval keeps the lambda at which each pair was last evaluated,
+    # because v_direct computes the final result from that iteration
+    Lambda=L.copy()
+    Lambda_eval=L.copy()
+    done=np.zeros(L.shape,dtype=bool)
+    active=np.arange(L.size)
+    for i in range(0,maxIter):
+        _,_,sin_sigma,cos_sigma,sigma,sin_alpha,cos_sq_alpha,cos2_sigma_m=terms(Lambda[active],active)
+        C=(f/16)*cos_sq_alpha*(4+f*(4-3*cos_sq_alpha))
+        Lambda_eval[active]=Lambda[active]
+        Lambda_new=L[active]+(1-C)*f*sin_alpha*(sigma+C*sin_sigma*(cos2_sigma_m+C*cos_sigma*(-1+2*cos2_sigma_m**2)))
+
+        # successful convergence
+        diff=np.abs(Lambda[active]-Lambda_new)
+        Lambda[active]=Lambda_new
+        hit=diff<=tol
+        done[active[hit]]=True
+        active=active[~hit]
+        if active.size==0:
+            break
+
+    everything=np.arange(L.size)
+    cos_lambda,sin_lambda,sin_sigma,cos_sigma,sigma,_,cos_sq_alpha,cos2_sigma_m=terms(Lambda_eval,everything)
+
+    u_sq=cos_sq_alpha*((a**2-b**2)/b**2)
+    A=1+(u_sq/16384)*(4096+u_sq*(-768+u_sq*(320-175*u_sq)))
+    B=(u_sq/1024)*(256+u_sq*(-128+u_sq*(74-47*u_sq)))
+    delta_sig=B*sin_sigma*(cos2_sigma_m+0.25*B*(cos_sigma*(-1+2*cos2_sigma_m**2)-(1/6)*B*cos2_sigma_m*(-3+4*sin_sigma**2)*(-3+4*cos2_sigma_m**2)))
+
+    y_amm = cos_u2* sin_lambda
+    x_amm = (cos_u1 * sin_u2) - (sin_u1*cos_u2*cos_lambda)
+    alpha1_amm = np.arctan2(y_amm,x_amm)
+    alpha1_amm = np.where(alpha1_amm < 0, alpha1_amm +2*pi, alpha1_amm)
+
+    m[idx]=b*A*(sigma-delta_sig)            # output distance in meters
+    az12[idx]=alpha1_amm*(180/pi)
+    converged[idx]=done
+    return m.reshape(shape), az12.reshape(shape), converged.reshape(shape)
+
+def v_inverse_batch(lat1,lon1,az12,s,maxIter=200,tol=1e-12):
+    """
+    Array version of v_inverse. Projects every (start point, azimuth, distance)
+    at once, every argument may be a scalar or an array (they are broadcast).
+
+    Returns (lat2, lon2, converged), converged being a boolean mask of the
+    points whose sigma iteration reached the tolerance within maxIter.
+    """
+    lat1,lon1,az12,s=np.broadcast_arrays(*(np.asarray(x,dtype=float) for x in (lat1,lon1,az12,s)))
+    shape=lat1.shape
+    lat1,lon1,az12,s=(np.atleast_1d(x).ravel() for x in (lat1,lon1,az12,s))
+
+    # Same constants as v_inverse
+    d2r = 180/pi
+    a = 6378137 # GRS80
+    flat = 298.257222101
+    f = 1/flat
+    b = a*(1-f)
+    e2 = f*(2-f)
+    ep2 = e2/(1-e2)
+
+    phi1 = lat1/d2r
+    alpha1 = az12/d2r
+    sin_alpha1 = np.sin(alpha1)
+    cos_alpha1 = np.cos(alpha1)
+
+    # [1]-[6] see v_inverse
+    psi1 = np.arctan((1-f)*np.tan(phi1))
+    psi0 = np.arccos(np.cos(psi1)*sin_alpha1)
+    u2 = ep2*(np.sin(psi0)**2)
+    sigma1 = np.arctan2(np.tan(psi1),cos_alpha1)
+    sin_alphaE = np.cos(psi0)
+    A = 1 + u2/16384*(4096 + u2*(-768 + u2*(320-175*u2)))
+    B = u2/1024*(256 + u2*(-128 + u2*(74-47*u2)))
+
+    # [7] Compute sigma by iteration, only for the points still moving
+    sigma = s/(b*A)
+    converged = np.zeros(sigma.shape,dtype=bool)
+    active = np.nonzero(~converged)
+    for i in range(0,maxIter):
+        sig = sigma[active]
+        Bk = B[active]
+        two_sigma_m = 2*sigma1[active] + sig
+        s1 = np.sin(sig)
+        s2 = s1*s1
+        c1 = np.cos(sig)
+        c1_2m = np.cos(two_sigma_m)
+        c2_2m = c1_2m*c1_2m
+        t1 = 2*c2_2m-1
+        t2 = -3+4*s2
+        t3 = -3+4*c2_2m
+        delta_sigma = Bk*s1*(c1_2m+Bk/4*(c1*t1-Bk/6*c1_2m*t2*t3))
+        sigma_new = s[active]/(b*A[active])+delta_sigma
+        hit = np.abs(sigma_new-sig) < tol
+        # like v_inverse, a converged point keeps the sigma it was tested with
+        sigma[active] = np.where(hit, sig, sigma_new)
+        converged[active] = hit
+        active = np.nonzero(~converged)
+        if active[0].size==0:
+            break
+
+    s1 = np.sin(sigma)
+    c1 = np.cos(sigma)
+    # [8] Compute latitude of P2
+    y = np.sin(psi1)*c1+np.cos(psi1)*s1*cos_alpha1
+    x = (1-f)*np.sqrt(sin_alphaE**2+(np.sin(psi1)*s1-np.cos(psi1)*c1*cos_alpha1)**2)
+    lat2 = np.arctan2(y,x)*d2r
+    # [9] Compute longitude difference domega on the auxiliary sphere
+    y = s1*sin_alpha1
+    x = np.cos(psi1)*c1-np.sin(psi1)*s1*cos_alpha1
+    domega = np.arctan2(y,x)
+    # [10] Compute Vincenty's constant C
+    x = 1-sin_alphaE**2
+    C = f/16*x*(4+f*(4-3*x))
+    # [11] Compute longitude difference on ellipsoid
+    two_sigma_m = 2*sigma1 + sigma
+    c1_2m = np.cos(two_sigma_m)
+    c2_2m = c1_2m*c1_2m
+    dlambda = domega-(1-C)*f*sin_alphaE*(sigma+C*s1*(c1_2m+C*c1*(-1+2*c2_2m)))
+    lon2 = lon1+dlambda*d2r
+
+    return lat2.reshape(shape), lon2.reshape(shape), converged.reshape(shape)
+
 # TEST CODE BEGINS HERE
 
 
@@ -1,4 +1,17 @@
+"""
+This file converts the GFS GRIB2 files into wind_for_coordinates.csv: the u and v wind at every waypoint at every hour.
+
+Every GRIB file is one forecast hour. The files are decoded in parallel (one process per file) and every
+hour is written as its own slice in wind_parts. A small manifest remembers from which version of a GRIB file
+each slice was made, so after a new forecast cycle only the changed hours are decoded again.
+At the end, the slices are streamed one by one into the csv, without building one big dataframe.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+import hashlib
+import json
 from pathlib import Path
+import numpy as np
 import pandas as pd
 import xarray as xr
 
@@ -6,30 +19,71 @@ pd.set_option('display.max_columns', None)
 pd.set_option('display.max_rows', None)
 
 
-from graph_build_for_bee.build_graph_function import build_graph
-nodes, node_coords, graph, N_RINGS, N_ANGLES = build_graph() #to get our coordinates with their IDs, we call the build_graph function
+location = Path(__file__).resolve().parent #help call the grib2 files with Path library
 
-"""
-first, we create a latitude and longitude list for all out waypoints that can be used by xarray
-"""
-point_ids = sorted(node_coords.keys()) #make sure all the node IDs from the graph are sorted from 0 to end node 610
-points = [node_coords[nid] for nid in point_ids] #for every nid (stands for node id) in the point_ids, get the coordinates
-lat_list = [lat for (lat, lon) in points] #the points are tuples (lat, lon). for the latitudes we want only lat
-lon_list = [lon for (lat, lon) in points] #the points are tuples (lat, lon). for the longitudes we want only lon
+FORECAST_HOURS = range(40) #we have the weather for t = 0 until t = 39 hours after the start
+files = [f"gfs.t18z.pgrb2.0p25.f{hour:03d}" for hour in FORECAST_HOURS] #all our GRIB2 files, every hour exactly once
+
+parts_dir = location / 'wind_parts' #one csv per forecast hour
+manifest_path = parts_dir / 'manifest.json' #which GRIB file version every part was made from
+output_path = location / 'wind_for_coordinates.csv'
+
+CRUISE_LEVEL_HPA = 250 #pressure level of our cruise altitude of 34,000 feet (FL340 is about 250 hPa)
+BBOX_MARGIN_DEG = 1.0 #extra degrees around the waypoints, so the bilinear interpolation always has neighbours
+
+
+def get_waypoints():
+    """
+    first, we create a latitude and longitude list for all out waypoints that can be used by xarray
+    """
+    from graph_build_for_bee.build_graph_function import build_graph
+    nodes, node_coords, graph, N_RINGS, N_ANGLES = build_graph() #to get our coordinates with their IDs, we call the build_graph function
 
+    point_ids = sorted(node_coords.keys()) #make sure all the node IDs from the graph are sorted from 0 to end node 610
+    points = [node_coords[nid] for nid in point_ids] #for every nid (stands for node id) in the point_ids, get the coordinates
+    lat_list = [lat for (lat, lon) in points] #the points are tuples (lat, lon). for the latitudes we want only lat
+    lon_list = [lon for (lat, lon) in points] #the points are tuples (lat, lon). for the longitudes we want only lon
+    return point_ids, lat_list, lon_list
 
-lats = xr.DataArray(lat_list, dims="point") #create a 1 dimensional list of latitudes with 1 latitude per waypoint
-lons = xr.DataArray(lon_list, dims="point") #create a 1 dimensional list of longitudes with 1 longitude per waypoint
 
 """
-Next, we want to create a dataframe for every grib 2 file. 
+Next, we want to create a dataframe for every grib 2 file.
 every file contains the weather information for coordinates at a specific time.
 we want weather direction and speed for every waypoint at given times.
 """
 
-def get_wind_from_grib(grib_path):
+def open_cruise_level(grib_path):
+    """
+    Open only the u and v wind at the cruise pressure level. The other levels and variables are never decoded.
+    """
+    ds = xr.open_dataset(grib_path, engine = 'cfgrib', backend_kwargs = {
+        'indexpath': '', #indexpath:'' ''  to prevent cfgrib from writing a persistent *.idx file to disk
+        'filter_by_keys': {'typeOfLevel': 'isobaricInhPa', 'level': CRUISE_LEVEL_HPA},
+    }) #open the grib file with cfgrib (engine which can read grib files)
+    if 'u' in ds and 'v' in ds:
+        return ds[['u', 'v']]
+
+    ds.close() #the file was downloaded with other keys (for example only one level), so open it as a whole
+    return xr.open_dataset(grib_path, engine = 'cfgrib', backend_kwargs = {'indexpath': ''})[['u', 'v']]
+
+
+def crop_to_waypoints(ds, lat_list, lon_list, margin = BBOX_MARGIN_DEG):
+    """
+    Keep only the window around our waypoints (their bounding box plus a margin) instead of the whole field.
+    """
+    lat = ds['latitude'].values
+    lon = ds['longitude'].values
+    lat_keep = np.nonzero((lat >= min(lat_list) - margin) & (lat <= max(lat_list) + margin))[0]
+    lon_keep = np.nonzero((lon >= min(lon_list) - margin) & (lon <= max(lon_list) + margin))[0]
+    if lat_keep.size == 0 or lon_keep.size == 0:
+        return ds #the waypoints are not inside the field (other longitude convention), keep it as it is
+    return ds.isel(latitude = lat_keep, longitude = lon_keep)
+
+
+def get_wind_from_grib(grib_path, point_ids, lat_list, lon_list):
 
-    ds = xr.open_dataset(grib_path, engine = 'cfgrib', backend_kwargs = {'indexpath': ''}) #open the grib file with cfgrib (engine which can read grib files). indexpath:'' ''  to prevent cfgrib from writing a persistent *.idx file to disk
+    ds = open_cruise_level(grib_path) #only u and v at the cruise level
+    ds = crop_to_waypoints(ds, lat_list, lon_list) #only the window around the grid, before anything is sorted or interpolated
 
     ds = ds.sortby('latitude')
     ds = ds.sortby('longitude') #for the bilinear interpolation the values should be ascending
@@ -39,6 +93,8 @@ def get_wind_from_grib(grib_path):
 
     valid_time = pd.Timestamp(ds['valid_time'].values) #to create a timestamp with pandas. later used to assign a time to the coordinates and wind condtions
 
+    lats = xr.DataArray(lat_list, dims="point") #create a 1 dimensional list of latitudes with 1 latitude per waypoint
+    lons = xr.DataArray(lon_list, dims="point") #create a 1 dimensional list of longitudes with 1 longitude per waypoint
 
     u_wp = u.interp(latitude=lats, longitude=lons, method='linear') #bilinearly interpolate the west to east wind at every waypoint
     v_wp = v.interp(latitude=lats, longitude=lons, method='linear') #bilinearly interpolate the south to north wind at every waypoint
@@ -56,108 +112,91 @@ def get_wind_from_grib(grib_path):
         'v_speed_ms': v_wp,
         'time': valid_time
     }) #creating the dataframe with all the desired keys and values
+    ds.close()
     return df
 
-"""
-Now we have the function to make the dataframe, we have to do this for all our grib2 files.
-we also have to merge the dataframes with a new column named time. so we have our coordinates 
-with all our values for a given time.
-"""
-
-location = Path(__file__).resolve().parent #help call the grib2 files with Path library
-
-files = [ #make a list for all our GRIB2 files
-    "gfs.t18z.pgrb2.0p25.f000", #weather at t = 0
-    "gfs.t18z.pgrb2.0p25.f001",
-    "gfs.t18z.pgrb2.0p25.f002",
-    "gfs.t18z.pgrb2.0p25.f003",
-    "gfs.t18z.pgrb2.0p25.f004",
-    "gfs.t18z.pgrb2.0p25.f005",
-    "gfs.t18z.pgrb2.0p25.f006",
-    "gfs.t18z.pgrb2.0p25.f007",
-    "gfs.t18z.pgrb2.0p25.f008",
-    "gfs.t18z.pgrb2.0p25.f009", #weather at t = 9 hours after start
-    "gfs.t18z.pgrb2.0p25.f009",
-    "gfs.t18z.pgrb2.0p25.f010",
-    "gfs.t18z.pgrb2.0p25.f011",
-    "gfs.t18z.pgrb2.0p25.f012",
-    "gfs.t18z.pgrb2.0p25.f013",
-    "gfs.t18z.pgrb2.0p25.f014",
-    "gfs.t18z.pgrb2.0p25.f015",
-    "gfs.t18z.pgrb2.0p25.f016",
-    "gfs.t18z.pgrb2.0p25.f017",
-    "gfs.t18z.pgrb2.0p25.f018",
-    "gfs.t18z.pgrb2.0p25.f019",
-    "gfs.t18z.pgrb2.0p25.f020",
-    "gfs.t18z.pgrb2.0p25.f021",
-    "gfs.t18z.pgrb2.0p25.f022",
-    "gfs.t18z.pgrb2.0p25.f023",
-    "gfs.t18z.pgrb2.0p25.f024",
-    "gfs.t18z.pgrb2.0p25.f025",
-    "gfs.t18z.pgrb2.0p25.f026",
-    "gfs.t18z.pgrb2.0p25.f027",
-    "gfs.t18z.pgrb2.0p25.f028",
-    "gfs.t18z.pgrb2.0p25.f029",
-    "gfs.t18z.pgrb2.0p25.f030",
-    "gfs.t18z.pgrb2.0p25.f031",
-    "gfs.t18z.pgrb2.0p25.f032",
-    "gfs.t18z.pgrb2.0p25.f033",
-    "gfs.t18z.pgrb2.0p25.f034",
-    "gfs.t18z.pgrb2.0p25.f035",
-    "gfs.t18z.pgrb2.0p25.f036",
-    "gfs.t18z.pgrb2.0p25.f037",
-    "gfs.t18z.pgrb2.0p25.f038",
-    "gfs.t18z.pgrb2.0p25.f039",
-]
-
-dataframes = {} #make a dictionary with the files as key and dataframe as values
-
-for name in files:
-    path = location / name #for reading the grib2 file in the next statement
-    df_name = get_wind_from_grib(path) #create all the dataframes
-    dataframes[name] = df_name #put all the dataframes in the dictionary
-
-whole_dataframe = pd.concat(list(dataframes.values()), ignore_index=True) #make 1 big dataframe for all grib files. concat stacks all the dataframes
-whole_dataframe = whole_dataframe.sort_values(['time', 'waypoint_id']).reset_index(drop = True) #sort so that the time is ascending for each waypoint id (the IDs are also ascending). Drop the old indexes and replace with the new ones so that the indices are ascending one by one
 
 """
-the last step is to make a column with the time in hours. 
-because the calculate edge costs function uses time in hours, 
-the UTC time cannot be used. 
-we have to create the start time first, which is the first timestamp in the dataframe (1-13-2026 18.00 UTC).
+Now we have the function to make the dataframe, we have to do this for all our grib2 files.
+every file is done by a separate process and written to its own part, so nothing big is kept in memory.
 """
 
-t0 = whole_dataframe['time'].min()
-
-whole_dataframe['time_hours'] = (whole_dataframe['time'] - t0) / pd.Timedelta(hours = 1) #make a new column which shows the total flight time that corresponds with the timestamp. and creates a float
-
-whole_dataframe.to_csv('wind_for_coordinates.csv', index = False) #export the csv with all weather data for the coordinates at several timestamps
-
-
-
-
-
-
-
-
+def file_fingerprint(path):
+    stat = Path(path).stat()
+    return f"{stat.st_size}:{stat.st_mtime_ns}" #if the size or modification time changes, the file is decoded again
 
 
+def waypoint_fingerprint(point_ids, lat_list, lon_list):
+    text = ",".join(f"{nid}:{lat!r}:{lon!r}" for nid, lat, lon in zip(point_ids, lat_list, lon_list))
+    return hashlib.sha256(text.encode()).hexdigest() #if the grid changes, every hour has to be decoded again
 
 
+def decode_hour(name, point_ids, lat_list, lon_list): #this runs in a worker process
+    df = get_wind_from_grib(location / name, point_ids, lat_list, lon_list)
+    df.to_csv(parts_dir / f"{name}.csv", index=False) #write the slice of this hour straight to disk
+    return name, str(df['time'].iloc[0])
 
 
+def load_manifest():
+    if manifest_path.exists():
+        return json.loads(manifest_path.read_text())
+    return {'waypoints': None, 'files': {}}
 
 
+def save_manifest(manifest):
+    manifest_path.write_text(json.dumps(manifest, indent=2))
 
 
+def main(max_workers=None):
+    point_ids, lat_list, lon_list = get_waypoints()
+    parts_dir.mkdir(parents=True, exist_ok=True)
 
+    manifest = load_manifest()
+    waypoints = waypoint_fingerprint(point_ids, lat_list, lon_list)
+    if manifest['waypoints'] != waypoints:
+        manifest = {'waypoints': waypoints, 'files': {}} #other waypoints, so none of the old parts can be used
 
+    todo = [] #the hours that have to be decoded (again)
+    for name in files:
+        entry = manifest['files'].get(name)
+        if entry is None or entry['source'] != file_fingerprint(location / name) or not (parts_dir / f"{name}.csv").exists():
+            todo.append(name)
 
+    print(f"{len(files) - len(todo)} hours unchanged, decoding {len(todo)} GRIB files")
 
+    if todo:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            n = len(todo)
+            results = pool.map(decode_hour, todo, [point_ids] * n, [lat_list] * n, [lon_list] * n)
+            for name, valid_time in results:
+                manifest['files'][name] = {'source': file_fingerprint(location / name), 'valid_time': valid_time}
+                save_manifest(manifest) #saved after every hour, so an interrupted run can continue where it stopped
 
+    write_csv(manifest)
 
 
+"""
+the last step is to make a column with the time in hours.
+because the calculate edge costs function uses time in hours,
+the UTC time cannot be used.
+we have to create the start time first, which is the first timestamp in the dataframe (1-13-2026 18.00 UTC).
+"""
 
+def write_csv(manifest):
+    valid_times = {name: pd.Timestamp(manifest['files'][name]['valid_time']) for name in files}
+    t0 = min(valid_times.values()) #the start time, the earliest forecast hour
 
+    order = sorted(files, key=lambda name: valid_times[name]) #the time has to be ascending in the csv
+    tmp_path = output_path.with_suffix('.csv.tmp') #write next to the real csv first, so readers never see half a file
+    first = True
+    for name in order: #stream the parts into the csv one hour at a time
+        part = pd.read_csv(parts_dir / f"{name}.csv", parse_dates=['time'], float_precision='round_trip') #round_trip keeps every digit of the wind
+        part = part.sort_values('waypoint_id').reset_index(drop = True) #the IDs are ascending within each hour
+        part['time_hours'] = (part['time'] - t0) / pd.Timedelta(hours = 1) #make a new column which shows the total flight time that corresponds with the timestamp. and creates a float
+        part.to_csv(tmp_path, index = False, mode = 'w' if first else 'a', header = first, date_format = '%Y-%m-%d %H:%M:%S') #same time format for every hour, also at midnight
+        first = False
+    tmp_path.replace(output_path) #the weather model sees the new csv and rebuilds its binary cache
 
 
+if __name__ == "__main__":
+    main()
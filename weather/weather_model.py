@@ -1,88 +1,342 @@
 T_MAX = 39.0 #we have data for wind 39.0 hours after 1-13-2026 18.00 UTC.
 
-import pandas as pd
+import numpy as np
+import hashlib
+import json
 import math
+import os
+import shutil
 from pathlib import Path
 
 project_root = Path(__file__).resolve().parents[1]
 csv_path = project_root / 'weather' / 'wind_for_coordinates.csv' #again, this so that i dont have to copypaste CSVs later in other directories
-df = pd.read_csv(csv_path) #read the wind data
-
-"""
-for interpolation by time, we have to make tables with time as rows and the coordinates as values for u and v wind
-"""
-
-u_table = df.pivot(index='time_hours', columns='waypoint_id', values='u_speed_ms').sort_index() #make a table for the x wind on every hour
-v_table = df.pivot(index='time_hours', columns='waypoint_id', values='v_speed_ms').sort_index() #make a table for the y wind on every hour
+cache_dir = project_root / 'weather' / 'wind_cache' #binary copies of the csv (u.npy, v.npy, hours.npy, lat.npy, lon.npy and meta.json), one folder per version of the sources, made by build_wind_cache
+CACHE_FORMAT = 2 #change this if the layout of the cache changes, so old caches get rebuilt
+ROW_LISTS_MAX_VALUES = 1_000_000 #up to this size the wind is also kept as python lists, which is faster for single lookups
 
 t_max = T_MAX
 
 
-def get_wind_kmh(waypoint_id, time, heading): #make a function to determine wind
-    t = float(time) #we work with floats, so making sure everything is in a float
-    if t > t_max:
-        t = t_max #for the unlikely case that the total time exceeds the t_max. but if so, the weather at that time is equal to t_max weather
-
-    if t in u_table.index: #if t in hours is the same as a time in hours in de list, we don't have to interpolate
-        u = float(u_table.at[t, waypoint_id]) #look up in the table the u speed for that t and waypoint id
-        v = float(v_table.at[t, waypoint_id]) #look up in the table the v speed for that t and waypoint id
-
-    #now the interpolation begins.
-
-    else:
-        h0 = math.floor(t) #the value of the nearest time in the table under t
-        h1 = h0 + 1.0 #because we have a time resolution of 1 hour. thee nearest timestamp above t is h0 + 1.0
-
-
-        u0 = float(u_table.at[float(h0), waypoint_id]) #find the u speed for h0 and that waypoint id
-        v0 = float(v_table.at[float(h0), waypoint_id]) #find te v speed for h0 and that waypoint id
-        if h1 > t_max: #only the case if t == t_max
-            u = u0
-            v = v0
-        else:
-            u1 = float(u_table.at[float(h1), waypoint_id]) #find the u speed for h1 and that waypoint id
-            v1 = float(v_table.at[float(h1), waypoint_id]) #find the u speed for h1 and that waypoint id
-
-            u = u0 + (t-h0) * ((u1-u0)/(h1-h0))
-            v = v0 + (t-h0) * ((v1-v0)/(h1-h0)) #this is linear interpolation
-
+class WindField:
     """
-    Now, we calculate the wind speed and direction. first the speed with pythagoras theorem.
-    Then, calculate the direction where  the wind goes to.
-    arctan 2 gives the angle with the x-axis. So if the wind is going east, it gives 0. 
-    this has to be converted to 
+    The u and v wind of every waypoint at every forecast hour, stored as dense arrays.
+
+    u[hour_index, waypoint_id] and v[hour_index, waypoint_id] are in m/s. the hours are
+    1 hour apart, so the row of a time is found with integer arithmetic instead of a
+    pandas label lookup. get_wind_kmh answers one question at a time,
+    head_tail_kmh answers arrays of (waypoint, time, heading) in one call.
+    lat and lon (optional) are the coordinates of the wind waypoints, used to find
+    the nearest wind waypoint of the nodes of another (denser) grid.
     """
 
-    speed_ms = math.sqrt(u ** 2 + v ** 2) #wind speed
-    wind_to_deg = (90 - math.degrees(math.atan2(v, u))) % 360 #calculate where the wind is going, not from
-
-
-    diff = (wind_to_deg - heading + 180) % 360 - 180  #wind angle between aircraft heading and wind
-    head_tail_kmh = speed_ms * 3.6 * math.cos(math.radians(diff))  #calculating head or tail wind. if it is a tail wind. it gives a positive number. if it is a headwind, a negative one
-
-    return head_tail_kmh #retun the head or tail wind
+    def __init__(self, hours, u, v, cache_dir=None, lat=None, lon=None):
+        self.hours = np.ascontiguousarray(hours, dtype=float) #the forecast hours, ascending
+        self.u = np.ascontiguousarray(u, dtype=float) #shape (n_hours, n_waypoints). can be a memory map of the cache
+        self.v = np.ascontiguousarray(v, dtype=float)
+        self.cache_dir = cache_dir #set if u and v are memory mapped from the binary cache
+        self.lat = None if lat is None else np.asarray(lat, dtype=float) #coordinates of the wind waypoints
+        self.lon = None if lon is None else np.asarray(lon, dtype=float)
+
+        if self.u.shape != self.v.shape or self.u.shape[0] != len(self.hours):
+            raise ValueError("u, v and hours do not have matching shapes")
+        if len(self.hours) > 1 and not np.array_equal(np.diff(self.hours), np.ones(len(self.hours) - 1)):
+            raise ValueError("the wind field needs forecast hours that are exactly 1 hour apart")
+
+        self.t_first = float(self.hours[0])
+        self.t_max = float(self.hours[-1]) #after this time, the weather of t_max is used
+        self.n_hours, self.n_waypoints = self.u.shape
+        self._max_speed_kmh = None #see max_speed_kmh
+
+        if self.u.size <= ROW_LISTS_MAX_VALUES:
+            self._u_rows = self.u.tolist() #plain python lists are faster than numpy for looking up one value
+            self._v_rows = self.v.tolist()
+        else:
+            self._u_rows = self.u #too big for a private copy in every process, look up in the (shared) arrays
+            self._v_rows = self.v
+
+    def __getstate__(self):
+        if self.cache_dir is not None:
+            return {'cache_dir': self.cache_dir} #a worker process maps the same cache files, the pages are shared
+        return {'hours': self.hours, 'u': self.u, 'v': self.v, 'lat': self.lat, 'lon': self.lon} #only the arrays are sent to worker processes
+
+    def __setstate__(self, state):
+        if 'cache_dir' in state:
+            loaded = load_wind_cache(state['cache_dir'])
+            self.__init__(loaded.hours, loaded.u, loaded.v, cache_dir=loaded.cache_dir, lat=loaded.lat, lon=loaded.lon)
+        else:
+            self.__init__(state['hours'], state['u'], state['v'], lat=state.get('lat'), lon=state.get('lon'))
+
+    @classmethod
+    def from_dataframe(cls, wind):
+        """
+        Make the wind field from the long dataframe of wind_for_coordinates.csv
+        (one row per waypoint per hour).
+        """
+        u_table = wind.pivot(index='time_hours', columns='waypoint_id', values='u_speed_ms').sort_index() #time as rows and waypoint IDs as columns
+        v_table = wind.pivot(index='time_hours', columns='waypoint_id', values='v_speed_ms').sort_index()
+
+        waypoint_ids = u_table.columns.to_numpy()
+        if not np.array_equal(waypoint_ids, np.arange(len(waypoint_ids))): #the waypoint id is used as column index
+            raise ValueError("the waypoint IDs in the wind data should be 0, 1, 2, ... without gaps")
+
+        positions = wind.groupby('waypoint_id')[['latitude', 'longitude']].first().loc[u_table.columns] #the coordinates don't change with time
+
+        return cls(
+            u_table.index.to_numpy(dtype=float), u_table.to_numpy(dtype=float), v_table[u_table.columns].to_numpy(dtype=float),
+            lat=positions['latitude'].to_numpy(dtype=float), lon=positions['longitude'].to_numpy(dtype=float),
+        )
+
+    def nearest_waypoints(self, lat, lon, chunk_size=4096):
+        """
+        For every (lat, lon), the id of the nearest wind waypoint (smallest great circle angle).
+        This lets a grid that is denser than the wind data use the wind of the nearest known point.
+        """
+        if self.lat is None or self.lon is None:
+            raise ValueError("this wind field has no waypoint coordinates, rebuild the wind cache")
+
+        def unit_vectors(lat_deg, lon_deg): #points on the unit sphere, the largest dot product is the nearest point
+            phi = np.radians(np.asarray(lat_deg, dtype=float))
+            lam = np.radians(np.asarray(lon_deg, dtype=float))
+            return np.stack([np.cos(phi) * np.cos(lam), np.cos(phi) * np.sin(lam), np.sin(phi)], axis=-1)
+
+        known = unit_vectors(self.lat, self.lon)
+        query = unit_vectors(lat, lon).reshape(-1, 3)
+        nearest = np.empty(len(query), dtype=np.intp)
+        for start in range(0, len(query), chunk_size): #in chunks, so a grid of 100k nodes doesn't make one huge matrix
+            nearest[start:start + chunk_size] = np.argmax(query[start:start + chunk_size] @ known.T, axis=1)
+        return nearest.reshape(np.shape(lat))
+
+    def max_speed_kmh(self):
+        """
+        The highest wind speed (km/h) of every waypoint over all forecast hours.
+        The wind in between two hours is interpolated, so it is never stronger than this. no head or tail wind can be stronger either.
+        """
+        if self._max_speed_kmh is None:
+            self._max_speed_kmh = np.sqrt(self.u ** 2 + self.v ** 2).max(axis=0) * 3.6 #calculated once, on first use
+        return self._max_speed_kmh
+
+    def get_uv(self, waypoint_id, time):
+        """
+        u and v (m/s) at one waypoint, linearly interpolated in time.
+        """
+        if not 0 <= waypoint_id < self.n_waypoints:
+            raise KeyError(waypoint_id) #a negative index of the rows would silently give the wind of another waypoint
+        t = float(time)
+        if t > self.t_max:
+            t = self.t_max #the weather at t_max is used after the last forecast hour
+        if t < self.t_first:
+            t = self.t_first #and the first forecast hour before the first
+
+        position = t - self.t_first
+        i0 = int(position) #row of the nearest hour under t
+        u0 = self._u_rows[i0][waypoint_id]
+        v0 = self._v_rows[i0][waypoint_id]
+
+        fraction = position - i0
+        if fraction == 0.0: #t is exactly a forecast hour, no interpolation needed
+            return u0, v0
+
+        u1 = self._u_rows[i0 + 1][waypoint_id]
+        v1 = self._v_rows[i0 + 1][waypoint_id]
+        u = u0 + fraction * (u1 - u0)
+        v = v0 + fraction * (v1 - v0) #linear interpolation, the hours are 1.0 apart
+        return u, v
+
+    def get_wind_kmh(self, waypoint_id, time, heading):
+        """
+        Head or tail wind (km/h) for one waypoint, time and heading. tail wind is positive.
+        """
+        u, v = self.get_uv(waypoint_id, time)
+
+        speed_ms = math.sqrt(u ** 2 + v ** 2) #wind speed
+        wind_to_deg = (90 - math.degrees(math.atan2(v, u))) % 360 #calculate where the wind is going, not from
+
+        diff = (wind_to_deg - heading + 180) % 360 - 180 #wind angle between aircraft heading and wind
+        return speed_ms * 3.6 * math.cos(math.radians(diff))
+
+    def get_uv_batch(self, waypoint_ids, times):
+        """
+        Array version of get_uv. waypoint_ids and times are broadcast against each other.
+        """
+        waypoint_ids = np.asarray(waypoint_ids, dtype=np.intp)
+        t = np.clip(np.asarray(times, dtype=float), self.t_first, self.t_max)
+
+        position = t - self.t_first
+        i0 = np.floor(position).astype(np.intp)
+        fraction = position - i0
+        i1 = np.minimum(i0 + 1, self.n_hours - 1) #at t_max the fraction is 0, so the row above does not matter
+
+        u0 = self.u[i0, waypoint_ids]
+        v0 = self.v[i0, waypoint_ids]
+        u = u0 + fraction * (self.u[i1, waypoint_ids] - u0)
+        v = v0 + fraction * (self.v[i1, waypoint_ids] - v0)
+        return u, v
+
+    def head_tail_kmh(self, waypoint_ids, times, headings):
+        """
+        Array version of get_wind_kmh, for thousands of (waypoint, time, heading) at once.
+        """
+        u, v = self.get_uv_batch(waypoint_ids, times)
+
+        speed_ms = np.sqrt(u ** 2 + v ** 2)
+        wind_to_deg = (90 - np.degrees(np.arctan2(v, u))) % 360
+
+        diff = (wind_to_deg - np.asarray(headings, dtype=float) + 180) % 360 - 180
+        return speed_ms * 3.6 * np.cos(np.radians(diff))
 
 
+"""
+Parsing and pivoting the csv takes most of the start up time, so the u/v tables are also stored as a binary cache
+(.npy files). These are memory mapped: loading is almost instant and processes that use the same cache share the
+memory pages. The cache remembers a hash of its sources (the csv and the GRIB files it was made from) and is rebuilt
+automatically when one of them changes.
+"""
 
 
+def get_source_hash(source_csv=csv_path):
+    """
+    Fingerprint of the wind sources: name, size and modification time of the csv and of the GRIB files next to it.
+    """
+    source_csv = Path(source_csv)
+    sources = [source_csv] + sorted(source_csv.parent.glob('gfs.*'))
+    h = hashlib.sha256()
+    for path in sources:
+        stat = path.stat()
+        h.update(f"{path.name}:{stat.st_size}:{stat.st_mtime_ns}\n".encode())
+    return h.hexdigest()
 
 
+def wind_cache_path(source_csv=csv_path, directory=cache_dir):
+    """
+    The folder of the cache for the current sources. every version of the sources gets its own folder, so a cache
+    that is in use is never overwritten: a rebuild makes a new folder next to it.
+    """
+    return Path(directory) / f"v{CACHE_FORMAT}-{get_source_hash(source_csv)[:16]}"
 
 
+def build_wind_cache(source_csv=csv_path, directory=cache_dir):
+    """
+    The one time conversion step: read the csv and write the u/v tensors to the binary cache.
 
+    Everything is written to a temporary folder of this process first, which is then renamed to its final name
+    in one step (the same as src/graph_cache.py does). Other processes that start at the same time therefore
+    never see half written files. if another process was faster, its cache is used and ours is thrown away.
+    """
+    import pandas as pd #only needed to convert the csv, so it is not imported when the cache is used
+
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    target = wind_cache_path(source_csv, directory)
+    field = WindField.from_dataframe(pd.read_csv(source_csv))
+
+    tmp = directory / f".build.{os.getpid()}.tmp"
+    shutil.rmtree(tmp, ignore_errors=True) #left over from a crashed build with the same pid
+    tmp.mkdir()
+    np.save(tmp / 'hours.npy', field.hours)
+    np.save(tmp / 'u.npy', field.u)
+    np.save(tmp / 'v.npy', field.v)
+    np.save(tmp / 'lat.npy', field.lat)
+    np.save(tmp / 'lon.npy', field.lon)
+    meta = {
+        'format': CACHE_FORMAT,
+        'hours': int(field.n_hours),
+        'waypoints': int(field.n_waypoints),
+        'source_hash': get_source_hash(source_csv),
+    }
+    (tmp / 'meta.json').write_text(json.dumps(meta, indent=2))
+
+    try:
+        os.replace(tmp, target) #atomic. fails if another process already put a complete cache there
+    except OSError:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    for old in directory.glob('v*-*'): #caches of older sources. processes that still map them keep their (deleted) files
+        if old != target:
+            shutil.rmtree(old, ignore_errors=True)
+    return field
+
+
+def load_wind_cache(directory=None):
+    """
+    Memory map the binary cache. nothing is read from disk until the values are used.
+    directory is a cache folder made by build_wind_cache. None means the one of the current sources.
+    """
+    directory = wind_cache_path() if directory is None else Path(directory)
+    hours = np.load(directory / 'hours.npy')
+    u = np.load(directory / 'u.npy', mmap_mode='r')
+    v = np.load(directory / 'v.npy', mmap_mode='r')
+    lat = np.load(directory / 'lat.npy')
+    lon = np.load(directory / 'lon.npy')
+    return WindField(hours, u, v, cache_dir=str(directory), lat=lat, lon=lon)
 
 
+def wind_cache_is_valid(source_csv=csv_path, directory=cache_dir):
+    """
+    True if the cache of the current sources exists and has the current layout.
+    """
+    meta_path = wind_cache_path(source_csv, directory) / 'meta.json'
+    if not meta_path.exists():
+        return False
+    try:
+        meta = json.loads(meta_path.read_text())
+    except ValueError:
+        return False
+    return meta.get('format') == CACHE_FORMAT and meta.get('source_hash') == get_source_hash(source_csv)
 
 
+"""
+The wind field is loaded once per process, on first use, and shared by every module that needs wind.
+importing this file is therefore cheap. worker processes get it from their parent with attach_wind_field
+(for example as the initializer of a process pool) so they don't have to parse the csv again.
+"""
 
+_wind_field = None
 
 
+def get_wind_field():
+    global _wind_field
+    if _wind_field is None:
+        try:
+            if not wind_cache_is_valid():
+                build_wind_cache() #first run or the sources changed: convert the csv once
+            _wind_field = load_wind_cache() #the fast way: memory map the binary cache
+        except (OSError, ValueError, EOFError): #cache can't be written (read only folder) or a file is damaged
+            import pandas as pd
+            _wind_field = WindField.from_dataframe(pd.read_csv(csv_path)) #just use the csv
+    return _wind_field
 
 
+def attach_wind_field(wind_field):
+    global _wind_field
+    _wind_field = wind_field #use a wind field that was already loaded, for example by the parent process
 
 
+def get_wind_ids(node_coords):
+    """
+    The nearest wind waypoint of every node of a grid, as a list indexed by node id.
+    For the grid the wind was made for this is just 0, 1, 2, ... so it is only needed for other grids.
+    """
+    node_ids = sorted(node_coords.keys())
+    lat = [node_coords[nid][0] for nid in node_ids]
+    lon = [node_coords[nid][1] for nid in node_ids]
+    nearest = get_wind_field().nearest_waypoints(lat, lon).tolist()
 
+    wind_ids = [0] * (node_ids[-1] + 1)
+    for nid, wind_id in zip(node_ids, nearest):
+        wind_ids[nid] = wind_id
+    return wind_ids
 
 
+def get_wind_kmh(waypoint_id, time, heading): #make a function to determine wind
+    """
+    Now, we calculate the wind speed and direction. first the speed with pythagoras theorem.
+    Then, calculate the direction where  the wind goes to.
+    arctan 2 gives the angle with the x-axis. So if the wind is going east, it gives 0.
+    if it is a tail wind. it gives a positive number. if it is a headwind, a negative one
+    """
+    return get_wind_field().get_wind_kmh(waypoint_id, time, heading) #retun the head or tail wind
 
 
+if __name__ == "__main__":
+    build_wind_cache() #run this file to (re)build the binary wind cache by hand
+    print(f"Wind cache written to {cache_dir}")